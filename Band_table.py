@@ -0,0 +1,115 @@
+"""
+Band_table - the spectrometer's bands in one place, shared by the FT, spur extraction and DR pulse tools.
+
+Each band used to be spelled out in if/elif chains in every GUI, with the PDRO, crop edges, nominal range
+and pulse defaults typed in again each time (and not always the same way: the DR tool drives the high band
+with the 13600 MHz PDRO through the doubler, which the FT tool has to call 27200 MHz). Here a band is a
+single entry, and the table is read from bands.json when there is one, so a new band (or new hardware)
+is a config change rather than a code change.
+
+bands.json is looked for in $BAND_TABLE (a file name), then next to this file, then one directory up
+(so the py3 copies find the one in the top directory). It looks like
+
+    {"bands": [
+        {"name": "high", "text": "High (18.0-26.5 GHz)", "PDRO": 27200, "multiplier": 2,
+         "lower_bound": 18000.0, "upper_bound": 26500.0, "range": [18000.0, 26500.0],
+         "chirp": [350, 4600], "DR_frequency": 25124.872},
+        ...]}
+
+with frequencies in MHz:
+    PDRO           the LO that the FT frequency axis is measured down from (after any multiplier)
+    multiplier     how many times the synthesizer PDRO (PDRO/multiplier) is multiplied up, e.g. 2 for a doubler
+    lower/upper    the part of the FT that gets kept for this band
+    range          the band's nominal range, for checking DR frequencies (default: lower/upper)
+    chirp          default chirp start/stop before mixing (default: 100, 4900)
+    DR_frequency   default DR frequency (default: the middle of range)
+
+Nothing in here should import PyQt5 or matplotlib.
+"""
+
+from __future__ import division, print_function
+
+from collections import OrderedDict, namedtuple
+import json
+import os
+
+
+Band = namedtuple("Band", ["text", "PDRO", "lower_bound", "upper_bound", "multiplier", "range_low", "range_high", "chirp_start", "chirp_stop", "DR_frequency"])
+
+Default_Bands = OrderedDict([ # Used when there's no bands.json; same values as the one that ships with the scripts
+    ("low", Band("Low (8.7-13.5 GHz)", 13600, 8000.0, 13500.0, 1, 8700.0, 13500.0, 100.0, 4900.0, 12178.593)),
+    ("medium", Band("Medium (13.5-18.3 GHz)", 18400, 13500.0, 18000.0, 1, 13500.0, 18300.0, 100.0, 4900.0, 16395.740)),
+    ("high", Band("High (18.0-26.5 GHz)", 27200, 18000.0, 26500.0, 2, 18000.0, 26500.0, 350.0, 4600.0, 25124.872))])
+
+Band_Table_Variable = "BAND_TABLE"
+Band_Table_Name = "bands.json"
+All_Bands_Text = "All Bands (one file each)" # Extra combo box entry (or "all" on the command line) for FTing every band from the same FID
+
+
+def Band_Table_File(): # The bands.json to use, or None to use Default_Bands
+    if os.environ.get(Band_Table_Variable):
+        return os.environ[Band_Table_Variable]
+    here = os.path.dirname(os.path.abspath(__file__))
+    for directory in (here, os.path.dirname(here)):
+        if os.path.isfile(os.path.join(directory, Band_Table_Name)):
+            return os.path.join(directory, Band_Table_Name)
+    return None
+
+
+def Band_From_Config(entry): # One band from its bands.json entry, filling in the optional fields
+    try:
+        (lower_bound, upper_bound) = (float(entry["lower_bound"]), float(entry["upper_bound"]))
+        (range_low, range_high) = [float(value) for value in entry.get("range", (lower_bound, upper_bound))]
+        (chirp_start, chirp_stop) = [float(value) for value in entry.get("chirp", (100.0, 4900.0))]
+        return Band(str(entry.get("text", entry["name"])), float(entry["PDRO"]), lower_bound, upper_bound, int(entry.get("multiplier", 1)),
+                    range_low, range_high, chirp_start, chirp_stop, float(entry.get("DR_frequency", (range_low + range_high)/2)))
+    except KeyError as e:
+        raise ValueError("Band %s is missing %s."%(entry.get("name", "?"), e))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Band %s has a bad value: %s"%(entry.get("name", "?"), e))
+
+
+def Load_Band_Table(file_name=None): # band name -> Band, in table order; raises ValueError/IOError for a bands.json that can't be used
+    if file_name is None:
+        file_name = Band_Table_File()
+    if file_name is None:
+        return OrderedDict(Default_Bands)
+    with open(file_name) as table_file:
+        try:
+            config = json.load(table_file)
+        except ValueError as e:
+            raise ValueError("%s isn't valid JSON: %s"%(file_name, e))
+    bands = OrderedDict((str(entry["name"]), Band_From_Config(entry)) for entry in config.get("bands", []))
+    if len(bands) == 0:
+        raise ValueError("%s doesn't define any bands."%(file_name))
+    return bands
+
+
+Bands = Load_Band_Table() # Read once, when the first tool imports this
+
+
+def Band_Name(band_text): # Short name of a band from its combo box text (or its short name)
+    for name in Bands:
+        if (band_text == name) or (band_text == Bands[name].text):
+            return name
+    raise ValueError("Unknown band: %s"%(band_text))
+
+
+def Band_From_Text(band_text): # Looks up a band by its combo box text (or its short name)
+    return Bands[Band_Name(band_text)]
+
+
+def Band_Names(band_text): # "high", "Low (8.7-13.5 GHz)", "low,high", "all" or All_Bands_Text -> list of short band names
+    if band_text in ("all", All_Bands_Text):
+        return list(Bands.keys())
+    if (band_text in Bands) or any(band_text == Bands[name].text for name in Bands):
+        return [Band_Name(band_text)]
+    return [Band_Name(text.strip()) for text in band_text.split(",")]
+
+
+def Band_Texts(): # Combo box entries, in table order
+    return [Bands[name].text for name in Bands]
+
+
+def DR_Frequency(band, frequency): # What the AWG has to put out for a DR pulse at frequency (MHz) in band: below the synthesizer PDRO, before any multiplier
+    return (band.PDRO - frequency)/band.multiplier
@@ -22,6 +22,8 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from matplotlib.figure import Figure
 from matplotlib import rcParams
 
+from Band_table import Bands, Band_From_Text, Band_Texts, DR_Frequency
+
 class Ui_Dialog_First_Window(object):
     def setupUi(self, Dialog):
         Dialog.setObjectName("Dialog")
@@ -43,8 +45,8 @@ class Ui_Dialog_First_Window(object):
         self.band_select = QtWidgets.QComboBox(Dialog)
         self.band_select.setObjectName("band_select") # Do we have to add a function to deal with it if someone changes the value? No, we only read from this right before using the data, so it should just work.
         self.band_select.setToolTip("This is the band for which the pulse is being generated.")
-        self.band_select.addItems(["Low (8.7-13.5 GHz)", "Medium (13.5-18.3 GHz)", "High (18.0-26.5 GHz)"])
-        self.band_select.setCurrentIndex(2) # high band as default
+        self.band_select.addItems(Band_Texts()) # From bands.json, if there is one
+        self.band_select.setCurrentIndex(list(Bands.keys()).index("high") if "high" in Bands else 0) # high band as default
         self.band_select.activated.connect(self.band_change)
         self.gridLayout.addWidget(self.band_select, 0, 0, 1, 2)
         self.use_defaults_cb = QtWidgets.QCheckBox(Dialog)
@@ -281,13 +283,9 @@ class Ui_Dialog_First_Window(object):
             self.marker_off_input.setEnabled(False)
             self.waveform_time_input.setEnabled(False)
 
-            band = self.band_select.currentText()
-            if (band=="High (18.0-26.5 GHz)"):
-                self.chirp_start_input.setText("350")
-                self.chirp_stop_input.setText("4600")
-            else:
-                self.chirp_start_input.setText("100")
-                self.chirp_stop_input.setText("4900")
+            band = Band_From_Text(self.band_select.currentText())
+            self.chirp_start_input.setText("%g"%(band.chirp_start))
+            self.chirp_stop_input.setText("%g"%(band.chirp_stop))
 
             self.chirp_start_input.setEnabled(False)
             self.chirp_stop_input.setEnabled(False)
@@ -322,7 +320,7 @@ class Ui_Dialog_First_Window(object):
                 self.sinc_duration_input.setText("0.5")
             if self.sinc_amplitude_input.text() == "":
                 self.sinc_amplitude_input.setText("1")
-            band = self.band_select.currentText()
+            band = Band_From_Text(self.band_select.currentText())
             temp_sinc_text = self.sinc_cent_freq_input.text()
 
             if temp_sinc_text != "":
@@ -334,23 +332,10 @@ class Ui_Dialog_First_Window(object):
                     self.sinc_cent_freq_input.setFocus()
                     return 0
 
-            if (band == "High (18.0-26.5 GHz)"):
-                if (temp_sinc_text == ""):
-                    self.sinc_cent_freq_input.setText("25124.872") # Favorite methanol transitions <3
-                elif (temp_sinc_float < 18000.0) or (temp_sinc_float > 26500.0):
-                    self.sinc_cent_freq_input.setText("25124.872")
-
-            elif (band == "Medium (13.5-18.3 GHz)"):
-                if (temp_sinc_text == ""):
-                    self.sinc_cent_freq_input.setText("16395.740")
-                elif (temp_sinc_float < 13500.0) or (temp_sinc_float > 18300.0):
-                    self.sinc_cent_freq_input.setText("16395.740")
-
-            elif (band == "Low (8.7-13.5 GHz)"):
-                if (temp_sinc_text == ""):
-                    self.sinc_cent_freq_input.setText("12178.593")
-                elif (temp_sinc_float < 8700.0) or (temp_sinc_float > 13500.0):
-                    self.sinc_cent_freq_input.setText("12178.593")
+            if (temp_sinc_text == ""):
+                self.sinc_cent_freq_input.setText("%.3f"%(band.DR_frequency)) # Favorite methanol transitions <3
+            elif (temp_sinc_float < band.range_low) or (temp_sinc_float > band.range_high):
+                self.sinc_cent_freq_input.setText("%.3f"%(band.DR_frequency))
 
 
     def band_change(self):
@@ -454,7 +439,7 @@ class Ui_Dialog_First_Window(object):
             return 0
 
         chirp_name = self.file_export_input.text()
-        band = self.band_select.currentText()
+        band = Band_From_Text(self.band_select.currentText())
         Width = Overall_Chirp_Stop - Overall_Chirp_Start
 
         if DR_decision:
@@ -506,30 +491,12 @@ class Ui_Dialog_First_Window(object):
 
             gap = sinc_start + (Sinc_Window/2)
 
-            if (band == "Low (8.7-13.5 GHz)"):
-                if (Sinc_Cent_Freq < 8700.0) or (Sinc_Cent_Freq > 13500.0):
-                    self.error_message = "DR frequency is not in lower band range (8700 - 13500 MHz)!"
-                    self.raise_error()
-                    self.sinc_cent_freq_input.setFocus()
-                    return 0
-                PDRO = 13600
-                Sinc_Freq = PDRO - Sinc_Cent_Freq
-            elif (band == "Medium (13.5-18.3 GHz)"):
-                if (Sinc_Cent_Freq < 13500.0) or (Sinc_Cent_Freq > 18300.0):
-                    self.error_message = "DR frequency is not in mid band range (13500 - 18300 MHz)!"
-                    self.raise_error()
-                    self.sinc_cent_freq_input.setFocus()
-                    return 0
-                PDRO = 18400
-                Sinc_Freq = PDRO - Sinc_Cent_Freq
-            elif (band == "High (18.0-26.5 GHz)"):
-                if (Sinc_Cent_Freq < 18000.0) or (Sinc_Cent_Freq > 26500.0):
-                    self.error_message = "DR frequency is not in high band range (18000 - 26500 MHz)!"
-                    self.raise_error()
-                    self.sinc_cent_freq_input.setFocus()
-                    return 0
-                PDRO = 13600
-                Sinc_Freq = PDRO - (Sinc_Cent_Freq/2)
+            if (Sinc_Cent_Freq < band.range_low) or (Sinc_Cent_Freq > band.range_high):
+                self.error_message = "DR frequency is not in %s band range (%g - %g MHz)!"%(band.text.split()[0].lower(), band.range_low, band.range_high)
+                self.raise_error()
+                self.sinc_cent_freq_input.setFocus()
+                return 0
+            Sinc_Freq = DR_Frequency(band, Sinc_Cent_Freq) # e.g. 13600 - f for the low band, 13600 - f/2 for the (doubled) high band
 
         waveform_points = int(numpy.ceil((total_waveform_time*10**-6)*(sample_rate*(10**9))))
 
@@ -0,0 +1,582 @@
+"""
+FID_io - shared routines for getting time-domain FIDs off the disk and into
+NumPy arrays, used by both the FT and spur extraction GUIs.
+
+The GUIs used to read FIDs one row at a time and append each value to a list,
+which was fine for short records but takes minutes (and a few GB of RAM) on
+tens of millions of rows from the 40 GS/s scope. The loader here reads the file
+in big chunks and lets NumPy do all of the parsing.
+
+The digitizer can also write raw int8/int16/float32 binary (a tenth the size of the text), and those files
+(and .npy) are opened with np.memmap instead of being read in, so cutting out a gate only reads the gate
+from the disk. The sample type, byte offset and scale of a raw file come from its extension, optionally
+overridden by a small JSON header next to it (file_name + ".hdr", e.g. {"dtype": "<i2", "offset": 512,
+"scale": 3.05e-5}) -- the same kind of header FT_engine writes next to raw spectra.
+
+Text FIDs can't be memory-mapped, but when only a gate is needed (FT_engine, or the FT GUI once a file has
+dropped out of the cache) Load_FID_Gate uses a sparse index of where every Line_Index_Every'th row starts,
+built once per file with a fast scan for newlines, to seek to the gate and parse only the rows in it.
+The index is also saved next to the FID (data.txt -> data.txt.idx.npz) and reused for as long as the FID's
+modification time and size match, so the length, time axis and gate reads of a big file are instant in later
+sessions and in the other tools; set $FID_INDEX_SIDECARS to 0 to keep indexes in memory only. An index built
+while fully parsing the file (the first Load_FID of it) also holds the min/max of each block of rows, which
+FID_Overview returns; the GUIs plot FIDs longer than Max_Plot_Points as that envelope instead of point by point.
+
+Nothing in here should import PyQt5 or matplotlib, so it can be used from
+scripts as well.
+"""
+
+from __future__ import division, print_function
+
+from collections import OrderedDict
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import warnings
+
+import numpy as np
+
+from LRU_cache import LRU_Cache
+
+
+Default_Chunk_Bytes = 16*1024*1024 # How much text to hand to NumPy at once; big enough to be fast, small enough to not matter for memory
+Max_Loaded_FIDs = 4 # Enough for a data file and a blank (plus a couple of spares) without hanging on to every file ever opened
+Line_Index_Every = 4096 # Rows between indexed offsets; a gate read parses at most this many extra rows at each end
+Line_Index_Chunk_Bytes = 4*1024*1024 # Smaller than Default_Chunk_Bytes; the scan (which parses nothing) makes a byte/char temporary plus a few per row
+Max_Line_Indexes = 16 # The indexes are small (one offset per Line_Index_Every rows), so keep more of them than parsed FIDs
+Max_Gated_Blanks = 4 # A blank or two, at a couple of gates each
+Max_Plot_Points = 1 << 22 # FIDs longer than this are plotted as their per-block min/max envelope (FID_Overview) instead of point by point
+Line_Index_Suffix = ".idx.npz" # data.txt -> data.txt.idx.npz
+Line_Index_Version = 1 # Bump if the sidecar contents change, so old sidecars get rebuilt instead of misread
+Index_Sidecar_Variable = "FID_INDEX_SIDECARS" # Set to 0 to never write .idx.npz sidecars (e.g. for shared data directories); existing ones are still read
+
+
+def Count_Columns(file_name): # Looks at the first non-empty row to decide how many columns the file has
+    with open(file_name) as input_file:
+        for row in input_file:
+            temp = row.split()
+            if len(temp) > 0:
+                return len(temp)
+    raise ValueError("%s doesn't contain any data."%(file_name))
+
+
+def Parse_Last_Column(text, num_columns): # Parses a block of complete rows and keeps only the last column, like temp[np.size(temp)-1] used to
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning) # Older NumPy only warns (and returns partial data) on unparseable text
+        try:
+            values = np.fromstring(text, sep=" ")
+        except DeprecationWarning as e: # Same error as newer NumPy raises, so callers only have to catch ValueError
+            raise ValueError("unparseable FID text (%s)"%(e))
+    if values.size % num_columns != 0:
+        raise ValueError("Rows don't all have %d columns."%(num_columns))
+    if num_columns == 1:
+        return values
+    return values[num_columns-1::num_columns].copy() # copy so the other columns can be freed right away
+
+
+def Text_Blocks(file_name, chunk_bytes=Default_Chunk_Bytes):
+    # Yields (offset in the file, text) for successive blocks of complete rows, so a row is never split between two blocks.
+    # The last row of the file doesn't need a newline after it.
+    position = 0
+    leftover = b""
+
+    with open(file_name, 'rb') as input_file:
+        while True:
+            data = input_file.read(chunk_bytes)
+            block = leftover + data
+            if not data:
+                if block.strip():
+                    yield position, block
+                break
+            cut = block.rfind(b"\n") + 1 # Only hand out complete rows; carry the partial one over to the next block
+            leftover = block[cut:]
+            if cut > 0:
+                yield position, block[:cut]
+                position += cut
+
+
+def Load_FID_Text(file_name, chunk_bytes=Default_Chunk_Bytes):
+    # Reads a whitespace-delimited text FID with one or more columns and returns the last column as a float array,
+    # along with the time it took so the caller can report a load rate. Raises IOError/ValueError like open()/float() did.
+    start_time = time.time()
+    num_columns = Count_Columns(file_name)
+    chunks = [Parse_Last_Column(block, num_columns) for (position, block) in Text_Blocks(file_name, chunk_bytes)]
+
+    if len(chunks) == 0:
+        raise ValueError("%s doesn't contain any data."%(file_name))
+
+    FID = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    return FID, time.time() - start_time
+
+
+Raw_FID_Types = OrderedDict([ # extension -> sample type when there's no header saying otherwise (None: needs a header)
+    (".i8", "i1"),
+    (".i16", "<i2"),
+    (".f32", "<f4"),
+    (".f64", "<f8"),
+    (".bin", None)])
+
+
+def Is_Binary_FID(file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    return (extension == ".npy") or (extension in Raw_FID_Types)
+
+
+class Mapped_FID(object):
+    # A memory-mapped FID that looks enough like the float array Load_FID_Text returns for the rest of the code:
+    # size/len, indexing and slicing (which only read the samples asked for, converted to float and scaled) and
+    # np.asarray() for the times the whole thing is needed, like plotting. Nothing is ever written back to the file.
+    def __init__(self, samples, scale=1.0):
+        self.samples = samples
+        self.scale = float(scale)
+        self.size = samples.shape[0]
+        self.shape = (self.size,)
+        self.dtype = np.dtype(np.float64)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        values = np.array(self.samples[index], dtype=np.float64) # Always a copy in memory, never a view of the file
+        if self.scale != 1.0:
+            values *= self.scale
+        return values
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        return values
+
+
+def Raw_FID_Header(file_name): # dtype/offset/scale for a raw file: extension defaults, then whatever file_name + ".hdr" says
+    header = {"dtype": Raw_FID_Types.get(os.path.splitext(file_name)[1].lower()), "offset": 0, "scale": 1.0, "shape": None}
+    if os.path.exists(file_name + ".hdr"):
+        with open(file_name + ".hdr") as header_file:
+            header.update(json.load(header_file))
+    if header["dtype"] is None:
+        raise ValueError("%s needs a %s.hdr header giving its dtype."%(file_name, os.path.basename(file_name)))
+    return header
+
+
+def Header_Stamp(file_name): # (mtime, size) of file_name + ".hdr", or None if there isn't one; the header changes what a raw file's bytes mean, so caches check it too
+    try:
+        header_stat = os.stat(file_name + ".hdr")
+    except OSError:
+        return None
+    return (header_stat.st_mtime, header_stat.st_size)
+
+
+def Open_FID_Binary(file_name, dtype=None, offset=None, scale=None):
+    # Memory-maps a .npy or raw binary FID and returns (Mapped_FID, time taken); dtype/offset/scale override the header.
+    # Multi-column files (a .npy or a header "shape" with more than one column) use the last column, like the text loader.
+    start_time = time.time()
+    if os.path.splitext(file_name)[1].lower() == ".npy":
+        samples = np.load(file_name, mmap_mode="r")
+        file_scale = 1.0
+    else:
+        header = Raw_FID_Header(file_name)
+        dtype = np.dtype(header["dtype"] if dtype is None else dtype)
+        offset = int(header["offset"] if offset is None else offset)
+        file_scale = header["scale"]
+        num_columns = header["shape"][-1] if (header["shape"] is not None) and (len(header["shape"]) > 1) else 1
+        num_samples = (os.path.getsize(file_name) - offset)//(dtype.itemsize*num_columns)
+        if num_samples <= 0:
+            raise ValueError("%s doesn't contain any data."%(file_name))
+        samples = np.memmap(file_name, dtype=dtype, mode="r", offset=offset, shape=(num_samples, num_columns))
+    if samples.ndim > 1:
+        samples = samples.reshape(samples.shape[0], -1)[:, -1] # Still just a (strided) view of the file
+    if samples.size == 0:
+        raise ValueError("%s doesn't contain any data."%(file_name))
+    return Mapped_FID(samples, file_scale if scale is None else scale), time.time() - start_time
+
+
+def Read_FID(file_name): # Any supported FID format as (FID, load time), for code that doesn't need to know which; binary FIDs come back memory-mapped
+    if Is_Binary_FID(file_name):
+        return Open_FID_Binary(file_name)
+    return Load_FID_Text(file_name)
+
+
+def Load_Rate_Message(num_rows, load_time): # Human-readable summary for the status window/console
+    if load_time > 0.0:
+        return "%d rows in %.2f s (%.0f rows/s)"%(num_rows, load_time, num_rows/load_time)
+    return "%d rows"%(num_rows)
+
+
+class Loaded_FID(object): # A parsed FID plus enough information about the file to tell whether it's still the same file
+    def __init__(self, file_name, FID, mtime, size, load_time, header_stamp=None):
+        self.file_name = file_name
+        self.FID = FID
+        self.mtime = mtime
+        self.size = size
+        self.load_time = load_time
+        self.header_stamp = header_stamp # Header_Stamp when it was parsed
+
+    def key(self):
+        return (self.file_name, self.mtime, self.size, self.header_stamp)
+
+    def is_current(self): # False if the file (or its .hdr header) has been changed (or removed) since it was parsed
+        try:
+            file_stat = os.stat(self.file_name)
+        except OSError:
+            return False
+        return (file_stat.st_mtime == self.mtime) and (file_stat.st_size == self.size) and (Header_Stamp(self.file_name) == self.header_stamp)
+
+
+loaded_FIDs = LRU_Cache(Max_Loaded_FIDs) # file name -> Loaded_FID
+
+
+def Load_FID(file_name):
+    # Returns the parsed FID for file_name, only parsing the file if it hasn't been loaded yet or has changed on disk since.
+    # This lets the GUI load a file once and then hand the same array to every FT, regardless of how often the gate or band changes.
+    file_name = os.path.abspath(file_name)
+    file_stat = os.stat(file_name) # stat before parsing so a file that changes mid-parse doesn't get cached as current
+    header_stamp = Header_Stamp(file_name)
+
+    data_set = loaded_FIDs.get(file_name)
+    if (data_set is None) or (data_set.mtime != file_stat.st_mtime) or (data_set.size != file_stat.st_size) or (data_set.header_stamp != header_stamp):
+        index = None if Is_Binary_FID(file_name) else Current_Line_Index(file_name, file_stat)
+        if Is_Binary_FID(file_name) or ((index is not None) and (index.block_min is not None)):
+            (FID, load_time) = Read_FID(file_name)
+        else: # First full load of a text FID: build its index (and sidecar) on the way through, since every byte is being read anyway
+            (FID, index, load_time) = Load_FID_Text_Indexed(file_name)
+            Save_Line_Index(index)
+            Remember_Line_Index(index)
+        data_set = Loaded_FID(file_name, FID, file_stat.st_mtime, file_stat.st_size, load_time, header_stamp)
+
+    return loaded_FIDs.put(file_name, data_set)
+
+
+class Line_Index(object):
+    # Where every `every`th data row of a text FID starts, plus the file details it was built from. When the index was built
+    # during a full parse it also has the min/max of each block of `every` rows, which is enough for an overview plot.
+    def __init__(self, file_name, offsets, num_rows, num_columns, every, mtime, size, file_hash, block_min=None, block_max=None):
+        self.file_name = file_name
+        self.offsets = offsets # byte offset of row i*every
+        self.num_rows = num_rows
+        self.num_columns = num_columns
+        self.every = every
+        self.mtime = mtime
+        self.size = size
+        self.file_hash = file_hash # SHA-1 of the rows, for telling files apart regardless of name
+        self.block_min = block_min
+        self.block_max = block_max
+
+    def byte_range(self, start_row, stop_row): # Bytes covering rows start_row:stop_row, and the row the range starts on
+        first_block = start_row//self.every
+        last_block = -(-stop_row//self.every)
+        stop_byte = self.offsets[last_block] if last_block < self.offsets.size else self.size
+        return self.offsets[first_block], stop_byte, first_block*self.every
+
+
+def Row_Starts(block): # Offsets in block of the start of every row with something in it; blank/whitespace-only lines aren't rows, same as for the parser
+    characters = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(characters == 10)
+    if (ends.size == 0) or (ends[-1] != characters.size - 1):
+        ends = np.append(ends, characters.size) # The last row in the file may not have a newline
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Only looks at the start of each line rather than at every byte: almost every row starts with a printable character (anything but
+    # whitespace and control characters) and is settled on the first pass; rows with leading whitespace move on a character per pass.
+    nonblank = np.zeros(starts.size, dtype=bool)
+    rows = np.arange(starts.size)
+    position = starts
+    while rows.size > 0:
+        inside = position < ends[rows] # Rows that run out of characters first are blank
+        (rows, position) = (rows[inside], position[inside])
+        printable = characters[position] > 32
+        nonblank[rows[printable]] = True
+        (rows, position) = (rows[~printable], position[~printable] + 1)
+    return starts[nonblank]
+
+
+def Scan_FID_Text(file_name, every, chunk_bytes, parse):
+    # One pass over a text FID that builds its Line_Index and, with parse=True, also parses it and fills in the per-block min/max.
+    # Returns (Line_Index, FID or None).
+    file_stat = os.stat(file_name)
+    num_columns = Count_Columns(file_name)
+    file_hash = hashlib.sha1()
+    offsets = []
+    chunks = []
+    num_rows = 0
+
+    for (position, block) in Text_Blocks(file_name, chunk_bytes):
+        file_hash.update(block)
+        starts = Row_Starts(block)
+        rows = np.arange(num_rows, num_rows + starts.size)
+        offsets.extend((position + starts[rows % every == 0]).tolist())
+        num_rows += starts.size
+        if parse:
+            chunks.append(Parse_Last_Column(block, num_columns))
+
+    if num_rows == 0:
+        raise ValueError("%s doesn't contain any data."%(file_name))
+    index = Line_Index(file_name, np.array(offsets, dtype=np.int64), num_rows, num_columns, every, file_stat.st_mtime, file_stat.st_size, file_hash.hexdigest())
+    if not parse:
+        return index, None
+
+    FID = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    if FID.size != num_rows:
+        raise ValueError("Rows don't all have %d columns."%(num_columns))
+    block_starts = np.arange(0, num_rows, every)
+    index.block_min = np.minimum.reduceat(FID, block_starts)
+    index.block_max = np.maximum.reduceat(FID, block_starts)
+    return index, FID
+
+
+def Build_Line_Index(file_name, every=Line_Index_Every, chunk_bytes=Line_Index_Chunk_Bytes): # Scans a text FID for newlines (without parsing any numbers) and returns a Line_Index for it
+    return Scan_FID_Text(file_name, every, chunk_bytes, False)[0]
+
+
+def Load_FID_Text_Indexed(file_name, every=Line_Index_Every, chunk_bytes=Default_Chunk_Bytes): # Load_FID_Text that also builds the file's Line_Index in the same pass; returns (FID, index, load time)
+    start_time = time.time()
+    (index, FID) = Scan_FID_Text(file_name, every, chunk_bytes, True)
+    return FID, index, time.time() - start_time
+
+
+def Is_FID_Sidecar(file_name): # Index and raw-header files that live next to FIDs but aren't FIDs themselves
+    return file_name.endswith(Line_Index_Suffix) or file_name.endswith(".hdr")
+
+
+def Index_Sidecar_Name(file_name):
+    return file_name + Line_Index_Suffix
+
+
+def Save_Line_Index(index): # Writes the index next to its FID so later sessions (and other tools) don't have to rescan it; quietly does nothing where that isn't allowed
+    if os.environ.get(Index_Sidecar_Variable, "1") == "0":
+        return
+    fields = {"version": Line_Index_Version, "offsets": index.offsets, "num_rows": index.num_rows, "num_columns": index.num_columns, "every": index.every,
+              "mtime": index.mtime, "size": index.size, "file_hash": np.array(index.file_hash)}
+    if index.block_min is not None:
+        fields["block_min"] = index.block_min
+        fields["block_max"] = index.block_max
+    sidecar_name = Index_Sidecar_Name(index.file_name)
+    temp_name = "%s.%d%s"%(index.file_name, os.getpid(), Line_Index_Suffix) # Written under another name first, so nobody reads a half-written index
+    try:
+        with open(temp_name, 'wb') as sidecar_file:
+            np.savez(sidecar_file, **fields)
+        if os.path.exists(sidecar_name):
+            os.remove(sidecar_name)
+        os.rename(temp_name, sidecar_name)
+    except (IOError, OSError): # Read-only data directory, full disk, etc.; the index still works for this session
+        try:
+            os.remove(temp_name)
+        except OSError:
+            pass
+
+
+def Load_Line_Index(file_name, file_stat): # The sidecar index for file_name, or None if there isn't one or it's out of date
+    try:
+        with np.load(Index_Sidecar_Name(file_name)) as sidecar:
+            if (int(sidecar["version"]) != Line_Index_Version) or (float(sidecar["mtime"]) != file_stat.st_mtime) or (int(sidecar["size"]) != file_stat.st_size):
+                return None
+            block_min = sidecar["block_min"] if "block_min" in sidecar.files else None
+            block_max = sidecar["block_max"] if "block_max" in sidecar.files else None
+            return Line_Index(file_name, sidecar["offsets"], int(sidecar["num_rows"]), int(sidecar["num_columns"]), int(sidecar["every"]),
+                              file_stat.st_mtime, file_stat.st_size, str(sidecar["file_hash"]), block_min, block_max)
+    except Exception: # Missing, half-written or from some other version; it just gets rebuilt
+        return None
+
+
+line_indexes = LRU_Cache(Max_Line_Indexes) # file name -> Line_Index
+
+
+def Remember_Line_Index(index):
+    line_indexes.put(index.file_name, index)
+
+
+def Current_Line_Index(file_name, file_stat): # The index for file_name from memory or its sidecar, if either is up to date; doesn't scan the file
+    index = line_indexes.peek(file_name)
+    if (index is None) or (index.mtime != file_stat.st_mtime) or (index.size != file_stat.st_size):
+        index = Load_Line_Index(file_name, file_stat)
+    return index
+
+
+def Get_Line_Index(file_name): # Like Load_FID, but for the index: only scans the file (and writes a sidecar) if there's no up-to-date index in memory or on disk
+    file_name = os.path.abspath(file_name)
+    index = Current_Line_Index(file_name, os.stat(file_name))
+    if index is None:
+        index = Build_Line_Index(file_name)
+        Save_Line_Index(index)
+    Remember_Line_Index(index)
+    return index
+
+
+def FID_Overview(file_name): # (first row of each block, block min, block max) for an envelope plot of a long text FID without parsing it; None until it's been fully loaded once
+    if Is_Binary_FID(file_name): # Memory-mapped anyway, and there's no line index
+        return None
+    index = Get_Line_Index(file_name)
+    if index.block_min is None:
+        return None
+    return np.arange(0, index.num_rows, index.every), index.block_min, index.block_max
+
+
+def Load_FID_Text_Rows(file_name, start_row, stop_row, index=None): # Parses just rows start_row:stop_row (clipped to the file, like a slice) of a text FID
+    if index is None:
+        index = Get_Line_Index(file_name)
+    start_row = max(0, min(start_row, index.num_rows))
+    stop_row = max(start_row, min(stop_row, index.num_rows))
+    if start_row == stop_row:
+        return np.zeros(0)
+    (start_byte, stop_byte, first_row) = index.byte_range(start_row, stop_row)
+    with open(file_name, 'rb') as input_file:
+        input_file.seek(start_byte)
+        text = input_file.read(stop_byte - start_byte)
+    values = Parse_Last_Column(text, index.num_columns)
+    return values[start_row-first_row:stop_row-first_row].copy() # copy so the rows either side of the gate can be freed
+
+
+def FID_Length(file_name): # Number of samples, without parsing the file if it isn't already loaded
+    file_name = os.path.abspath(file_name)
+    data_set = loaded_FIDs.peek(file_name)
+    if (data_set is not None) and data_set.is_current():
+        return data_set.FID.size
+    if Is_Binary_FID(file_name):
+        return Open_FID_Binary(file_name)[0].size
+    return Get_Line_Index(file_name).num_rows
+
+
+def Load_FID_Gate(file_name, N1, N2):
+    # Samples N1:N2 of file_name (clipped like a slice), reading as little of the file as possible:
+    # straight from the Load_FID cache if it's there and current, else from a memory map or the line index.
+    file_name = os.path.abspath(file_name)
+    data_set = loaded_FIDs.peek(file_name)
+    if (data_set is not None) and data_set.is_current():
+        return data_set.FID[N1:N2]
+    if Is_Binary_FID(file_name):
+        return Open_FID_Binary(file_name)[0][N1:N2]
+    return Load_FID_Text_Rows(file_name, N1, N2)
+
+
+binary_hashes = {} # (file name, mtime, size, Header_Stamp) -> SHA-1 of a binary FID; text FIDs keep theirs in the line index
+
+
+def FID_Hash(file_name): # SHA-1 of an FID's contents, so caches can tell files apart (or recognize a copy) regardless of name
+    # For a raw binary FID the .hdr header's contents go into the hash too, since a new dtype/offset/scale is different data.
+    file_name = os.path.abspath(file_name)
+    if not Is_Binary_FID(file_name):
+        return Get_Line_Index(file_name).file_hash # Free once the index exists, and it's saved with it
+    file_stat = os.stat(file_name)
+    key = (file_name, file_stat.st_mtime, file_stat.st_size, Header_Stamp(file_name))
+    if key not in binary_hashes:
+        file_hash = hashlib.sha1()
+        with open(file_name, 'rb') as input_file:
+            for block in iter(lambda: input_file.read(Default_Chunk_Bytes), b""):
+                file_hash.update(block)
+        if key[3] is not None:
+            with open(file_name + ".hdr", 'rb') as header_file:
+                file_hash.update(header_file.read())
+        binary_hashes[key] = file_hash.hexdigest()
+    return binary_hashes[key]
+
+
+gated_blanks = LRU_Cache(Max_Gated_Blanks) # (blank file hash, N1, N2) -> gated blank
+
+
+def Load_Blank_Gate(file_name, N1, N2):
+    # Load_FID_Gate for a blank: the blank rarely changes within a session (or a batch), so its gate is kept, keyed by the
+    # file's contents and the gate, and every data file after the first gets it without touching the disk. The arrays are shared, so they're read-only.
+    key = (FID_Hash(file_name), N1, N2)
+    blank = gated_blanks.get(key)
+    if blank is None:
+        blank = np.array(Load_FID_Gate(file_name, N1, N2)) # A copy, so it doesn't pin a whole loaded FID in memory
+        blank.setflags(write=False)
+        gated_blanks.put(key, blank)
+    return blank
+
+
+class Time_Axis(object):
+    # Stands in for the old xdata lists (row_counter/sample_rate*1e6, in microseconds) without storing a value per point.
+    # Integer indexing (including negative indices) gives the same numbers the list did, so xdata[0] and xdata[-1] keep working;
+    # slices and values() build NumPy arrays only when something (usually a plot) actually needs them.
+    def __init__(self, sample_rate, length):
+        self.sample_rate = float(sample_rate)
+        self.length = int(length)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.values(*index.indices(self.length))
+        if index < 0:
+            index += self.length
+        if (index < 0) or (index >= self.length):
+            raise IndexError("Time axis index out of range")
+        return (index/self.sample_rate)*1e6
+
+    def time_of(self, index): # microseconds
+        return (index/self.sample_rate)*1e6
+
+    def index_of(self, time): # time in microseconds -> sample index, rounded down like the gate calculations
+        return int(np.floor(time*1e-6*self.sample_rate))
+
+    def values(self, start=0, stop=None, step=1): # NumPy array of times for indices start:stop:step
+        if stop is None:
+            stop = self.length
+        return (np.arange(start, stop, step)/self.sample_rate)*1e6
+
+
+def Sum_FIDs(file_names): # Running sum of the FIDs in file_names, in one array; returns (sum, number summed, [(file name, reason)] for the ones skipped)
+    total = None
+    count = 0
+    failures = []
+    for file_name in file_names:
+        try:
+            (FID, load_time) = Read_FID(file_name)
+        except (IOError, OSError, ValueError) as e:
+            failures.append((file_name, str(e)))
+            continue
+        if total is None:
+            total = np.asarray(FID) # The first file's array becomes the accumulator, so there's only ever one extra record in memory
+        elif FID.size != total.size:
+            failures.append((file_name, "has %d points, expected %d"%(FID.size, total.size)))
+            continue
+        else:
+            total += FID[:] # [:] reads a memory-mapped FID into memory; for a text FID it's just a view
+        count += 1
+    return total, count, failures
+
+
+def Average_FIDs(file_names, processes=1):
+    # Coherently averages a (possibly very long) list of shot files, streaming them so memory stays at about one record per process.
+    # With processes > 1 the list is split into that many contiguous pieces, each summed in its own process, and the partial sums are merged at the end.
+    # Returns (average, number averaged, failures, seconds); files that can't be read or have the wrong length are skipped and listed in failures.
+    start_time = time.time()
+    file_names = list(file_names)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(file_names))
+    if processes <= 1:
+        partial_sums = [Sum_FIDs(file_names)]
+    else:
+        piece_size = -(-len(file_names)//processes)
+        pieces = [file_names[i:i+piece_size] for i in range(0, len(file_names), piece_size)]
+        pool = multiprocessing.Pool(len(pieces))
+        try:
+            partial_sums = pool.map(Sum_FIDs, pieces)
+        finally:
+            pool.close()
+            pool.join()
+
+    total = None
+    count = 0
+    failures = []
+    for (partial_total, partial_count, partial_failures) in partial_sums:
+        failures.extend(partial_failures)
+        if partial_total is None:
+            continue
+        if total is None:
+            total = partial_total
+        elif partial_total.size != total.size: # A whole piece that disagrees with the others about the record length
+            failures.append(("%d files"%(partial_count), "have %d points, expected %d"%(partial_total.size, total.size)))
+            continue
+        else:
+            total += partial_total
+        count += partial_count
+
+    if count == 0:
+        raise ValueError("None of the files could be averaged.")
+    total /= count
+    return total, count, failures, time.time() - start_time
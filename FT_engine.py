@@ -0,0 +1,784 @@
+"""
+FT_engine - the number-crunching half of the FT GUI, with no PyQt5 or matplotlib in sight, so that it can
+run on the compute nodes (which have no display) or be called from scripts.
+
+The bands (PDRO, crop edges, ...) come from Band_table, which reads bands.json, so new bands need no code here.
+
+The steps are the same ones the GUI goes through: load -> gate -> blank-subtract -> window -> FT -> band-crop.
+Each one is a plain function, FT_File strings them all together, and running this file directly gives a
+command-line version, e.g.
+
+    python FT_engine.py data.txt spectrum.txt --sample-rate 40 --band high --gate-start 0 --gate-stop 8 --blank blank.txt
+
+For a whole directory (or glob) of FIDs that share one blank and one set of gate/band settings, add --batch;
+the files are spread over a pool of processes and each one gets its own spectrum in the output directory:
+
+    python FT_engine.py "run12/*.txt" run12_FT --batch --processes 8 --sample-rate 40 --band high --blank blank.txt
+
+Thousands of shot files can instead be coherently averaged first (streamed, so memory stays at one record)
+and the average FT'd, with --average:
+
+    python FT_engine.py "run12/*.txt" run12_avg_FT.txt --average --processes 4 --sample-rate 40 --band high
+
+Input FIDs can be text, .npy or raw binary (.i8/.i16/.f32/.f64/.bin, see FID_io); binary ones are memory-mapped,
+so only the gate is read from the disk; text ones are indexed so only the rows in the gate get parsed.
+
+The output format follows the output_file extension: .txt/.csv (text, as before), .npy, .f32/.f64 (raw
+little-endian, with a .hdr JSON header alongside) or .h5 (only when h5py is installed). --output-format picks one for --batch.
+
+--band also takes a comma-separated list (or "all"); the FID is then read, windowed and FT'd once and each band's
+crop goes to its own file (spectrum_low.txt, spectrum_high.txt, ...).
+
+--check-memory (Python 3) skips the FT of a file and instead runs test FTs of a few gate lengths under tracemalloc,
+failing if any of them peaks above FT_Memory_Estimate/Zoom_Memory_Estimate:
+
+    python FT_engine.py --check-memory
+
+FT_script_GUI is now just a front end for the functions in here.
+"""
+
+from __future__ import division, print_function
+
+from collections import OrderedDict
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+try: # Only needed for .h5 output
+    import h5py
+except ImportError:
+    h5py = None
+
+from Band_table import Bands, Band_From_Text, Band_Names
+from LRU_cache import LRU_Cache
+from FID_io import Load_FID_Gate, Load_Blank_Gate, FID_Hash, FID_Length, Is_Binary_FID, Is_FID_Sidecar, Index_Sidecar_Variable, Time_Axis, Average_FIDs
+
+
+def Band_Output_Name(output_file,band_name): # spectrum.txt -> spectrum_high.txt, for when one FID gives a spectrum per band
+    (base, extension) = os.path.splitext(output_file)
+    return base + "_" + band_name + extension
+
+def Band_Output_Names(output_file,band_names): # Just output_file for a single band, so nothing changes unless several bands are asked for
+    if len(band_names) == 1:
+        return [output_file]
+    return [Band_Output_Name(output_file,name) for name in band_names]
+
+Zero_Fill_Policies = [ # (combo box text, policy name, default value)
+    ("16x (Power of 2)", "default", ""),
+    ("Oversample Factor", "oversample", "16"),
+    ("Point Spacing (kHz)", "spacing", "10"),
+    ("Fast Length", "fast", "8"),
+    ("Memory Budget (MB)", "memory", "1000")]
+
+def Next_Power_Of_2(n):
+    return int(2**np.ceil(np.log2(n)))
+
+def Next_Fast_Length(n): # Smallest 2^a 3^b 5^c >= n; numpy's FFT is nearly as quick for these as for powers of 2
+    best = Next_Power_Of_2(n)
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p235 = p35
+            while p235 < n:
+                p235 *= 2
+            best = min(best, p235)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+def Zero_Fill_Length(Npts,policy="default",value=None,sample=None): # Length the FID gets zero-filled to before the FT
+    if policy == "default":
+        Nfid = np.ceil(np.log2(Npts))+4 # This is maybe a bit excessive...
+        return int(np.power(2,Nfid))
+    if (policy in [entry[1] for entry in Zero_Fill_Policies]) and ((value is None) or (value <= 0.0)):
+        raise ValueError("The %s zero fill needs a value greater than zero!"%(policy))
+    if policy == "oversample": # value is the oversampling factor
+        return max(Next_Power_Of_2(int(np.ceil(value*Npts))), Npts)
+    if policy == "spacing": # value is the largest allowed point spacing in kHz
+        return max(Next_Fast_Length(int(np.ceil(sample/(value*1e3)))), Npts)
+    if policy == "fast": # value is the minimum oversampling factor
+        return max(Next_Fast_Length(int(np.ceil(value*Npts))), Npts)
+    if policy == "memory": # value is the memory budget in MB; back off from the default length until the FT fits
+        Nnew = Zero_Fill_Length(Npts)
+        while (FT_Memory_Estimate(Npts,Nnew) > value*1e6) and (Nnew//2 >= Npts):
+            Nnew //= 2
+        if FT_Memory_Estimate(Npts,Nnew) > value*1e6:
+            raise ValueError("Even without zero filling, the FT of this gate needs about %.0f MB, which is more than the %.0f MB budget."%(FT_Memory_Estimate(Npts,Nnew)/1e6,value))
+        return Nnew
+    raise ValueError("Unknown zero fill option: %s"%(policy))
+
+def FT_Memory_Estimate(Npts,NumFreq): # Rough peak memory (bytes) for Correct_FID_Length_Window + Freq_Spectrum with the real FFT, as the worker runs them
+    # Window (Npts) + the reused zero-filled buffer (NumFreq) + rfft output (NumFreq/2 complex) + roughly as much again of FFT scratch space.
+    # The magnitudes go back into the zero-filled buffer and the band is copied straight into the output, so nothing else is full-length.
+    # Before any of that, making a window that isn't cached yet takes up to about 9 gate-length arrays (np.kaiser's temporaries), which is more with little zero filling.
+    return max(Npts*8*9, Npts*8 + NumFreq*8 + (NumFreq//2+1)*16*2)
+
+def Zoom_Memory_Estimate(Npts,NumFreq,sample,PDRO,lower_bound,upper_bound): # Same idea, for Zoom_Spectrum
+    M = Band_Bins(NumFreq,sample,PDRO,lower_bound,upper_bound)[1]
+    B = max(1, min(M, Npts)) # Chirp_Z does the band a gate's worth of bins at a time
+    L = Next_Power_Of_2(Npts + B - 1)
+    return Npts*8*2 + Npts*(8+8+16+40) + M*16 + L*16*3 # window + windowed copy, index/phase/chirp arrays and a block's phase temporaries, the output, at most three padded sequences/FFTs at a time
+
+Blank_Modes = [ # (combo box text, blank mode)
+    ("Subtract FID", "time"), # Subtract the gated blank from the gated data before the FT (the original behavior)
+    ("Subtract Spectrum", "spectrum")] # FT the blank once (cached) and subtract its magnitude spectrum from each data spectrum; ignores phase, so it's not identical
+
+Window_Functions = [ # (combo box text, window name, default parameter)
+    ("Kaiser", "kaiser", "9.5"),
+    ("Hann", "hann", ""),
+    ("Blackman-Harris", "blackmanharris", ""),
+    ("None", "none", "")]
+
+def Make_Window(window_name,Npts,param=None): # Calculates a window function; param is only used by the Kaiser window (beta)
+    if window_name == "kaiser":
+        return np.kaiser(Npts,param)
+    if window_name == "hann":
+        return np.hanning(Npts)
+    if window_name == "blackmanharris": # 4-term Blackman-Harris (symmetric, like the numpy windows)
+        n = np.arange(Npts)*(2*np.pi/max(Npts-1,1))
+        return 0.35875 - 0.48829*np.cos(n) + 0.14128*np.cos(2*n) - 0.01168*np.cos(3*n)
+    if window_name == "none":
+        return np.ones(Npts)
+    raise ValueError("Unknown window function: %s"%(window_name))
+
+Max_Cached_Windows = 4
+window_cache = LRU_Cache(Max_Cached_Windows) # (window name, length, param) -> window
+
+def Get_Window(window_name,Npts,param=None): # Make_Window, but remembers the last few windows; the arrays are shared, so they're read-only
+    key = (window_name, Npts, param)
+    Window = window_cache.get(key)
+    if Window is not None:
+        return Window
+    Window = Make_Window(window_name,Npts,param)
+    Window.setflags(write=False)
+    return window_cache.put(key, Window)
+
+FT_buffer_lock = threading.Lock()
+spare_FT_buffers = [] # Holds the zero-filled buffer from the last FT so the next one (usually the same length) doesn't have to allocate it again
+
+def Borrow_FT_Buffer(Nnew): # A float buffer of length Nnew; nobody else will get it until it's handed back with Return_FT_Buffer
+    with FT_buffer_lock:
+        if (len(spare_FT_buffers) > 0) and (spare_FT_buffers[0].size == Nnew):
+            return spare_FT_buffers.pop()
+        del spare_FT_buffers[:] # Wrong length, so let it go before allocating a new one
+    return np.empty(Nnew)
+
+def Return_FT_Buffer(FT_buffer):
+    with FT_buffer_lock:
+        del spare_FT_buffers[:]
+        spare_FT_buffers.append(FT_buffer)
+
+def Correct_FID_Length_Window(local_FID,Window,Nnew=None,out=None): #this operation does zero filling and scaling of FID by window function; trying for good balance of resolution and intensity
+    # The windowed FID is written straight into out (a float array of length Nnew, e.g. from Borrow_FT_Buffer) and the rest of it is zeroed,
+    # so there are no intermediate full-length copies. Without out, a new buffer is allocated.
+    Npts = local_FID.size
+    if Nnew is None:
+        Nnew = Zero_Fill_Length(Npts)
+    if out is None:
+        out = np.empty(int(Nnew))
+    np.multiply(local_FID, Window, out=out[:Npts])
+    out[Npts:] = 0.0
+    return out
+
+def Freq_Axis(NumFreq,sample,PDRO): # Frequency axis for a NumFreq-point FT, in MHz, in the same (decreasing) order as the FT bins
+    Freq = PDRO - ((np.arange(NumFreq)*sample)/NumFreq)*(10**-6)
+    Freq[NumFreq-1] = 0.0 # The old loop never filled in the last bin, so it stays at 0 to keep the output identical
+    return Freq
+
+def Band_Indices(Freq,lower_bound,upper_bound): # Freq is the flipped (increasing) axis; finds the band edges by binary search
+    # Index 0 is the leftover 0 MHz bin, so the search skips it, which is what the old linear search effectively did.
+    low_index = int(np.searchsorted(Freq[1:], lower_bound, side='left')) + 1
+    if low_index >= Freq.size:
+        return 0, 0
+    high_index = int(np.searchsorted(Freq[low_index+1:], upper_bound, side='left')) + low_index + 1
+    if high_index >= Freq.size: # Never reached upper_bound; the old loop left high_index at 0, giving an empty crop
+        return low_index, 0
+    return low_index, high_index
+
+def Freq_Column(out,k_start,NumFreq,sample,PDRO): # Fills out with the Freq_Axis values for bins k_start, k_start-1, ... without any full-length temporaries
+    np.subtract(k_start, np.arange(out.size, dtype=float), out=out)
+    out *= sample
+    out /= NumFreq
+    out *= (10**-6)
+    np.subtract(PDRO, out, out=out)
+    if k_start == NumFreq-1:
+        out[0] = 0.0 # Freq_Axis leaves the last bin at 0
+    return out
+
+def Freq_Spectrum(local_FID,sample,PDRO,lower_bound=None,upper_bound=None,real_FT=True,overwrite_FID=False): # Does the actual Fourier transform
+    # If lower_bound and upper_bound (MHz) are given, only that band is returned; otherwise the whole spectrum is.
+    # The FID is real, so by default only the non-redundant half of the FT is calculated (rfft); |FT| at bin k and bin NumFreq-k
+    # are the same, so the other half is just looked up from it. real_FT=False does the full complex FFT the way it used to be done.
+    # With overwrite_FID, local_FID is used as scratch space for the magnitudes (so its contents are lost) instead of allocating more.
+    NumFreq = local_FID.size
+    if real_FT and np.isrealobj(local_FID):
+        return Freq_Spectra(local_FID,sample,[(PDRO,lower_bound,upper_bound)],overwrite_FID)[0]
+    ftcalc = np.fft.fft(local_FID,norm="ortho")
+    ftcalc = np.absolute(ftcalc)
+    Freq = Freq_Axis(NumFreq,sample,PDRO)[::-1] # This puts the frequency axis in increasing order
+    ftcalc = ftcalc[::-1]
+    if (lower_bound is None) or (upper_bound is None):
+        return np.column_stack((Freq,ftcalc))
+    (low_index, high_index) = Band_Indices(Freq,lower_bound,upper_bound)
+    return np.column_stack((Freq[low_index:high_index],ftcalc[low_index:high_index])) # Only the band gets copied into the output
+
+def Half_Spectrum_Magnitude(local_FID,overwrite_FID=False): # |rfft| of the (real) zero-filled FID, optionally written over local_FID
+    ftcalc = np.fft.rfft(local_FID,norm="ortho")
+    if overwrite_FID:
+        return np.absolute(ftcalc, out=local_FID[:ftcalc.size])
+    return np.absolute(ftcalc)
+
+def Crop_Half_Spectrum(half_ftcalc,NumFreq,sample,PDRO,lower_bound=None,upper_bound=None): # Two-column band spectrum from Half_Spectrum_Magnitude of a NumFreq-point FID
+    if (lower_bound is None) or (upper_bound is None):
+        (k_start, M) = (NumFreq-1, NumFreq) # Every bin, flipped so the frequency axis is in increasing order
+    else:
+        (k_start, M) = Band_Bins(NumFreq,sample,PDRO,lower_bound,upper_bound)
+    Ft = np.empty((M,2))
+    Freq_Column(Ft[:,0],k_start,NumFreq,sample,PDRO)
+    if k_start <= NumFreq//2: # The usual case: the band is entirely in the half spectrum, so it's a (reversed) slice of it
+        Ft[:,1] = half_ftcalc[k_start-M+1:k_start+1][::-1]
+    else:
+        bins = np.arange(k_start,k_start-M,-1)
+        Ft[:,1] = half_ftcalc[np.minimum(bins,NumFreq-bins)] # Mirrors the bins above NumFreq/2 back into the half spectrum
+    return Ft
+
+def Freq_Spectra(local_FID,sample,band_limits,overwrite_FID=False): # Freq_Spectrum (real FT) for several (PDRO, lower bound, upper bound) bands off one FFT; returns a list of spectra
+    # The FT magnitudes don't depend on the band at all, only each band's frequency axis and crop do, so the FFT is done once.
+    half_ftcalc = Half_Spectrum_Magnitude(local_FID,overwrite_FID)
+    return [Crop_Half_Spectrum(half_ftcalc,local_FID.size,sample,PDRO,lower_bound,upper_bound) for (PDRO, lower_bound, upper_bound) in band_limits]
+
+def Band_Edge_Bin(target,NumFreq,sample,PDRO,k_max): # Largest FT bin k <= k_max whose frequency on the Freq_Axis is >= target (MHz), or -1 if there isn't one
+    if k_max < 0:
+        return -1
+    k = int(np.floor((PDRO - target)*1e6*NumFreq/sample)) # Close guess, then nudge it using exactly the same arithmetic as Freq_Axis so the edges match the full FT
+    k = min(max(k,0),k_max)
+    while (k < k_max) and (PDRO - (((k+1)*sample)/NumFreq)*(10**-6) >= target):
+        k += 1
+    while (k >= 0) and (PDRO - ((k*sample)/NumFreq)*(10**-6) < target):
+        k -= 1
+    return k
+
+Max_Cached_Band_Bins = 32
+band_bins_cache = LRU_Cache(Max_Cached_Band_Bins) # (NumFreq, sample, PDRO, lower bound, upper bound) -> Band_Bins
+
+def Band_Bins(NumFreq,sample,PDRO,lower_bound,upper_bound): # FT bins that Freq_Spectrum would keep for this band: (first bin, number of bins), counting down from the first bin
+    # Worked out once per band and FT length; batch jobs (and the memory estimate plus the crop of the same FT) just look it up again.
+    key = (NumFreq, sample, PDRO, lower_bound, upper_bound)
+    bins = band_bins_cache.get(key)
+    if bins is not None:
+        return bins
+    return band_bins_cache.put(key, Find_Band_Bins(NumFreq,sample,PDRO,lower_bound,upper_bound))
+
+def Find_Band_Bins(NumFreq,sample,PDRO,lower_bound,upper_bound):
+    k_low = Band_Edge_Bin(lower_bound,NumFreq,sample,PDRO,NumFreq-2) # NumFreq-1 is the 0 MHz bin, which the crop never includes
+    if k_low < 0:
+        return k_low, 0
+    k_high = Band_Edge_Bin(upper_bound,NumFreq,sample,PDRO,k_low-1)
+    if k_high < 0: # Never reached upper_bound, so the crop is empty
+        return k_low, 0
+    return k_low, k_low - k_high
+
+def Chirp_Z(local_FID,NumFreq,k_start,k_step,M,block_bins=None): # DFT of local_FID (as if zero-filled to NumFreq points) at bins k_start + m*k_step for m = 0..M-1, via Bluestein's algorithm
+    out = np.empty(M, dtype=complex)
+    for (block_start, values) in Chirp_Z_Blocks(local_FID,NumFreq,k_start,k_step,M,block_bins):
+        out[block_start:block_start+values.size] = values
+    return out
+
+def Chirp_Z_Blocks(local_FID,NumFreq,k_start,k_step,M,block_bins=None):
+    # Chirp_Z, handed out block_bins (default: the gate length) bins at a time as (first m, DFT values), so the padded FFTs stay about twice
+    # the gate long however wide the band is. The chirp filter only depends on the block size, so it's transformed once for all of the blocks.
+    Npts = local_FID.size
+    if block_bins is None:
+        block_bins = Npts
+    B = max(1, min(M, block_bins))
+    L = Next_Power_Of_2(Npts + B - 1)
+    two_N = 2*NumFreq
+    n = np.arange(Npts, dtype=np.int64)
+    m = np.arange(max(B, Npts), dtype=np.int64)
+    # Phases are reduced modulo 2N in integer arithmetic first; n**2 gets big enough for long gates that doing it in floating point would lose precision.
+    chirp = np.exp(1j*np.pi*((k_step*m*m) % two_N)/NumFreq) # conj of the W**(n**2/2) factors
+    del m
+    b = np.zeros(L, dtype=complex)
+    b[:B] = chirp[:B]
+    b[L-Npts+1:] = chirp[1:Npts][::-1]
+    b = np.fft.fft(b)
+    n_squared = (k_step*n*n) % two_N
+    a = np.empty(L, dtype=complex)
+    for block_start in range(0, M, B):
+        block_M = min(B, M - block_start)
+        k_block = k_start + block_start*k_step
+        a[:Npts] = local_FID*np.exp(-1j*np.pi*((((2*k_block) % two_N)*n + n_squared) % two_N)/NumFreq)
+        a[Npts:] = 0.0
+        a = np.fft.fft(a) # Reassigning as we go means no more than three length-L arrays are alive at once
+        a *= b
+        a = np.fft.ifft(a)
+        yield block_start, np.conj(chirp[:block_M])*a[:block_M]
+
+def Zoom_Spectrum(local_FID,NumFreq,sample,PDRO,lower_bound,upper_bound): # Band-limited version of Freq_Spectrum(Correct_FID_Length_Window(...)) that only evaluates the bins in the band
+    # local_FID should be windowed but not zero-filled; NumFreq is the length it would have been zero-filled to.
+    (k_start, M) = Band_Bins(NumFreq,sample,PDRO,lower_bound,upper_bound)
+    if M == 0:
+        return np.zeros((0,2))
+    Ft = np.empty((M,2))
+    Freq_Column(Ft[:,0],k_start,NumFreq,sample,PDRO) # Same arithmetic as Freq_Axis, already in increasing order
+    for (block_start, values) in Chirp_Z_Blocks(local_FID,NumFreq,k_start,-1,M): # Straight into the output, so the whole band is never held as complex numbers
+        Ft[block_start:block_start+values.size,1] = np.absolute(values)
+    Ft[:,1] /= np.sqrt(NumFreq) # norm="ortho"
+    return Ft
+
+def Clamp_Gate(gate_start,gate_stop,time_axis): # Pulls the gate back inside the FID, same as the GUI has always done; times in microseconds
+    if gate_start >= gate_stop:
+        raise ValueError("Gate start should be smaller than gate stop!")
+    if gate_start < 0.0:
+        gate_start = 0.0
+    if gate_stop > time_axis[-1]:
+        gate_stop = time_axis[-1]
+    if gate_start >= gate_stop: # The gate was entirely past the end of the FID (or before its start)
+        raise ValueError("The gate doesn't overlap the FID, which runs from 0 to %g us!"%(time_axis[-1]))
+    return gate_start, gate_stop
+
+def Gate_Indices(gate_start,gate_stop,sample_rate): # Gate times (microseconds) -> N1, N2 sample indices
+    N1 = int(np.floor(gate_start*sample_rate*(10**-6)))
+    N2 = int(np.floor(gate_stop*sample_rate*(10**-6)))
+    return N1, N2
+
+def Gate_FID(data,N1,N2,blank=None): # Cuts out the gate and subtracts the (gated) blank if there is one
+    data_cut = data[N1:N2]
+    if blank is None:
+        return data_cut
+    blank_cut = blank[N1:N2]
+    if blank_cut.size != data_cut.size:
+        raise ValueError("Subtraction of blank from data didn't work! This probably happened because they don't have the same number of rows.")
+    return np.subtract(data_cut, blank_cut)
+
+def No_Progress(message):
+    pass
+
+Max_Cached_Blank_Spectra = 4
+blank_spectra_cache = LRU_Cache(Max_Cached_Blank_Spectra) # (blank hash, gate, FT settings, bands) -> blank spectra
+
+def Blank_Spectra(blank_file,N1,N2,Npts,sample_rate,band_limits,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress):
+    # FT_Gated_Bands of the blank's N1:N2 gate, remembered so a run over many data files with the same blank and settings only FTs the blank once.
+    # Npts is the length of the data gate it'll be subtracted from; the spectra are shared, so they're read-only.
+    key = (FID_Hash(blank_file), N1, N2, sample_rate, tuple(band_limits), window_name, window_param, zero_fill_policy, zero_fill_value, zoom_FT)
+    spectra = blank_spectra_cache.get(key)
+    if spectra is not None:
+        return spectra
+    blank = Load_Blank_Gate(blank_file,N1,N2)
+    if blank.size != Npts:
+        raise ValueError("Subtraction of blank from data didn't work! This probably happened because they don't have the same number of rows.")
+    progress("Taking FT of blank!")
+    spectra = FT_Gated_Bands(blank,sample_rate,band_limits,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT)
+    for Spectrum in spectra:
+        Spectrum.setflags(write=False)
+    return blank_spectra_cache.put(key, spectra)
+
+def Subtract_Blank_Spectra(spectra,blank_spectra): # Takes each blank spectrum's intensities off the matching data spectrum, in place
+    for (Spectrum, blank_Spectrum) in zip(spectra,blank_spectra):
+        Spectrum[:,1] -= blank_Spectrum[:,1]
+    return spectra
+
+def FT_Gate_Blanked(data,N1,N2,sample_rate,band_limits,blank_file=None,blank_mode="time",window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress):
+    # FT_Gated_Bands for data (already cut to the N1:N2 gate), with the same gate of blank_file taken off in the time domain or the spectrum, depending on blank_mode.
+    if blank_mode not in [mode[1] for mode in Blank_Modes]:
+        raise ValueError("Unknown blank mode: %s"%(blank_mode))
+    if blank_file and (blank_mode == "spectrum"):
+        blank_spectra = Blank_Spectra(blank_file,N1,N2,data.size,sample_rate,band_limits,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)
+        spectra = FT_Gated_Bands(data,sample_rate,band_limits,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)
+        progress("Subtracting blank spectrum!")
+        return Subtract_Blank_Spectra(spectra,blank_spectra)
+    blank = None
+    if blank_file:
+        blank = Load_Blank_Gate(blank_file,N1,N2)
+    full_FID = Gate_FID(data,0,data.size,blank)
+    return FT_Gated_Bands(full_FID,sample_rate,band_limits,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)
+
+def FT_Gated(full_FID,sample_rate,PDRO,lower_bound,upper_bound,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress):
+    # Window -> zero-fill -> FT -> band-crop for an already gated (and blank-subtracted) FID. Returns the two-column band spectrum.
+    # progress gets status messages along the way (the GUI hands it the worker's progress signal, the command line just prints them).
+    return FT_Gated_Bands(full_FID,sample_rate,[(PDRO,lower_bound,upper_bound)],window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)[0]
+
+def FT_Gated_Bands(full_FID,sample_rate,band_limits,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress):
+    # FT_Gated for a list of (PDRO, lower bound, upper bound) bands, returning a spectrum for each. The FID is windowed and zero-filled once,
+    # and without zoom_FT it's transformed once too; only the crops are per band. (A zoom FT only covers one band, so that's one chirp-z per band.)
+    Npts = full_FID.size
+    NumFreq = Zero_Fill_Length(Npts,zero_fill_policy,zero_fill_value,sample_rate)
+
+    if zoom_FT:
+        peak_memory = max(Zoom_Memory_Estimate(Npts,NumFreq,sample_rate,PDRO,lower_bound,upper_bound) for (PDRO, lower_bound, upper_bound) in band_limits)
+    else:
+        peak_memory = FT_Memory_Estimate(Npts,NumFreq)
+    progress("FT length will be %d points (%d-point gate); estimated peak memory %.1f MB."%(NumFreq,Npts,peak_memory/1e6))
+
+    progress("Applying window function!")
+    Window = Get_Window(window_name,Npts,window_param) # Cached, so repeated FTs of same-length gates don't recalculate it
+
+    if zoom_FT: # Only evaluates the bins inside the band, so there's no need to zero-fill
+        FID_Windowed = np.multiply(full_FID,Window)
+        progress("Taking band-limited FT of data!")
+        return [Zoom_Spectrum(FID_Windowed,NumFreq,sample_rate,PDRO,lower_bound,upper_bound) for (PDRO, lower_bound, upper_bound) in band_limits]
+
+    FT_buffer = Borrow_FT_Buffer(NumFreq) # Reused from the last FT if it was the same length
+    try:
+        FID_Windowed = Correct_FID_Length_Window(full_FID,Window,NumFreq,FT_buffer)
+        progress("Taking FT of data!")
+        return Freq_Spectra(FID_Windowed,sample_rate,band_limits,overwrite_FID=True) # The bounds prune each output to just the relevant frequency range for its band
+    finally:
+        Return_FT_Buffer(FT_buffer)
+
+Max_Cached_Half_Spectra = 4
+Max_Cached_Half_Spectrum_Bytes = 256*1024*1024 # Long zero-filled FTs are big; one bigger than this on its own isn't kept at all
+half_spectrum_cache = LRU_Cache(Max_Cached_Half_Spectra, Max_Cached_Half_Spectrum_Bytes, lambda cached: cached[1].nbytes) # (data hash, blank hash, blank mode, gate, sample rate, window, zero-fill) -> (NumFreq, half spectrum)
+
+def Gated_Half_Spectrum(full_FID,sample_rate,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,progress=No_Progress):
+    # Window -> zero-fill -> |rfft| of an already gated FID, before any band crop: (NumFreq, half spectrum), for Crop_Half_Spectrum.
+    Npts = full_FID.size
+    NumFreq = Zero_Fill_Length(Npts,zero_fill_policy,zero_fill_value,sample_rate)
+    progress("FT length will be %d points (%d-point gate); estimated peak memory %.1f MB."%(NumFreq,Npts,FT_Memory_Estimate(Npts,NumFreq)/1e6))
+    progress("Applying window function!")
+    Window = Get_Window(window_name,Npts,window_param)
+    FT_buffer = Borrow_FT_Buffer(NumFreq)
+    try:
+        FID_Windowed = Correct_FID_Length_Window(full_FID,Window,NumFreq,FT_buffer)
+        progress("Taking FT of data!")
+        return NumFreq, np.array(Half_Spectrum_Magnitude(FID_Windowed,overwrite_FID=True)) # Copied out of the buffer, since it's kept
+    finally:
+        Return_FT_Buffer(FT_buffer)
+
+def File_Half_Spectrum(data_file,N1,N2,sample_rate,blank_file=None,blank_mode="time",window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,progress=No_Progress):
+    # Gated_Half_Spectrum of the N1:N2 gate of data_file, blank subtracted, remembered by the files' contents and every setting the FT depends on
+    # (the bands aren't one of them). The arrays are shared, so they're read-only.
+    if blank_mode not in [mode[1] for mode in Blank_Modes]:
+        raise ValueError("Unknown blank mode: %s"%(blank_mode))
+    if not blank_file:
+        blank_mode = None
+    key = (FID_Hash(data_file), FID_Hash(blank_file) if blank_file else None, blank_mode, N1, N2, sample_rate, window_name, window_param, zero_fill_policy, zero_fill_value)
+    cached = half_spectrum_cache.get(key)
+    if cached is not None:
+        progress("Same data, blank, gate and FT settings as before; reusing that FT!")
+        return cached
+    progress("Cutting FID!")
+    data = Load_FID_Gate(data_file,N1,N2) # Only the gate is read, and not even that if the file is still loaded
+    blank = None
+    if blank_file:
+        if blank_mode == "time":
+            progress("Subtracting FID!")
+        blank = Load_Blank_Gate(blank_file,N1,N2)
+        if blank.size != data.size:
+            raise ValueError("Subtraction of blank from data didn't work! This probably happened because they don't have the same number of rows.")
+    if blank_mode == "spectrum":
+        (NumFreq, half_ftcalc) = Gated_Half_Spectrum(data,sample_rate,window_name,window_param,zero_fill_policy,zero_fill_value,progress)
+        progress("Subtracting blank spectrum!")
+        half_ftcalc -= File_Half_Spectrum(blank_file,N1,N2,sample_rate,None,"time",window_name,window_param,zero_fill_policy,zero_fill_value)[1] # The blank's is cached too, for the next data file
+    else:
+        (NumFreq, half_ftcalc) = Gated_Half_Spectrum(Gate_FID(data,0,data.size,blank),sample_rate,window_name,window_param,zero_fill_policy,zero_fill_value,progress)
+    half_ftcalc.setflags(write=False)
+    return half_spectrum_cache.put(key, (NumFreq, half_ftcalc))
+
+def FT_File_Gate_Bands(data_file,N1,N2,sample_rate,band_limits,blank_file=None,blank_mode="time",window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress):
+    # FT_Gate_Blanked for the N1:N2 gate of data_file, for going over the same file again and again with a different gate or band.
+    # The uncropped FT is cached (see File_Half_Spectrum), so changing only the band just crops it again, and a new gate only re-reads the gate.
+    # A zoom FT is band-specific, so that's always done from scratch (from the cached gates).
+    if zoom_FT:
+        progress("Cutting FID!")
+        return FT_Gate_Blanked(Load_FID_Gate(data_file,N1,N2),N1,N2,sample_rate,band_limits,blank_file,blank_mode,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)
+    (NumFreq, half_ftcalc) = File_Half_Spectrum(data_file,N1,N2,sample_rate,blank_file,blank_mode,window_name,window_param,zero_fill_policy,zero_fill_value,progress)
+    return [Crop_Half_Spectrum(half_ftcalc,NumFreq,sample_rate,PDRO,lower_bound,upper_bound) for (PDRO, lower_bound, upper_bound) in band_limits]
+
+CSV_Rows_Per_Write = 65536
+
+def Write_Spectrum_Text(file_name,Spectrum): # Byte-for-byte what np.savetxt(file_name, Spectrum, delimiter=', ') writes, but formats a block of rows per write instead of one row at a time
+    with open(file_name, 'w') as output_file:
+        for start in range(0, Spectrum.shape[0], CSV_Rows_Per_Write):
+            block = Spectrum[start:start+CSV_Rows_Per_Write]
+            output_file.write(("%.18e, %.18e\n"*block.shape[0])%tuple(block.ravel().tolist()))
+
+def Write_Spectrum_NPY(file_name,Spectrum):
+    np.save(file_name, Spectrum) # np.save would add .npy itself if it were missing, but Write_Spectrum only sends .npy names here
+
+def Write_Spectrum_Raw(file_name,Spectrum,dtype): # Raw little-endian floats, row by row (frequency, intensity), plus a small JSON header next to it
+    np.ascontiguousarray(Spectrum, dtype=np.dtype(dtype).newbyteorder("<")).tofile(file_name)
+    header = {"dtype": np.dtype(dtype).newbyteorder("<").str, "shape": list(Spectrum.shape), "columns": ["frequency (MHz)", "intensity (arb. units)"], "order": "C"}
+    with open(file_name + ".hdr", 'w') as header_file:
+        json.dump(header, header_file, indent=1)
+
+def Write_Spectrum_HDF5(file_name,Spectrum):
+    if h5py is None:
+        raise ValueError("Writing %s needs h5py, which isn't installed. Pick another output format."%(file_name))
+    with h5py.File(file_name, 'w') as output_file:
+        dataset = output_file.create_dataset("spectrum", data=Spectrum)
+        dataset.attrs["columns"] = "frequency (MHz), intensity (arb. units)"
+
+Spectrum_Writers = OrderedDict([ # file extension -> (description for file dialogs, writer)
+    (".txt", ("Text", Write_Spectrum_Text)),
+    (".csv", ("Text", Write_Spectrum_Text)),
+    (".npy", ("NumPy", Write_Spectrum_NPY)),
+    (".f32", ("Raw float32", lambda file_name, Spectrum: Write_Spectrum_Raw(file_name, Spectrum, np.float32))),
+    (".f64", ("Raw float64", lambda file_name, Spectrum: Write_Spectrum_Raw(file_name, Spectrum, np.float64)))])
+HDF5_Extensions = (".h5", ".hdf5")
+if h5py is not None: # Only offered when it can actually be written
+    for extension in HDF5_Extensions:
+        Spectrum_Writers[extension] = ("HDF5", Write_Spectrum_HDF5)
+
+def Check_Output_Name(file_name): # Raises ValueError for an output file that can't be written in its format, so that's found out before the FT rather than after
+    if (os.path.splitext(file_name)[1].lower() in HDF5_Extensions) and (h5py is None):
+        raise ValueError("Writing %s needs h5py, which isn't installed. Pick another output format."%(file_name))
+
+def Write_Spectrum(file_name,Spectrum): # Picks the writer by extension; anything unrecognized gets the same text format the GUI has always written
+    Check_Output_Name(file_name)
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in Spectrum_Writers:
+        Spectrum_Writers[extension][1](file_name,Spectrum)
+    else:
+        Write_Spectrum_Text(file_name,Spectrum)
+
+def Gate_For_Length(num_samples,sample_rate,gate_start=None,gate_stop=None): # Gate times (None means the start/end of the FID) -> N1, N2 for an FID of num_samples points
+    time_axis = Time_Axis(sample_rate,num_samples)
+    if gate_start is None:
+        gate_start = time_axis[0]
+    if gate_stop is None:
+        gate_stop = time_axis[-1]
+    (gate_start, gate_stop) = Clamp_Gate(gate_start,gate_stop,time_axis)
+    (N1, N2) = Gate_Indices(gate_start,gate_stop,sample_rate)
+    if N1 >= N2:
+        raise ValueError("The gate is shorter than one sample!")
+    return N1, N2
+
+def Band_Limits(band_names): # (PDRO, lower bound, upper bound) for each band, as FT_Gated_Bands wants them
+    return [(Band_From_Text(name).PDRO, Band_From_Text(name).lower_bound, Band_From_Text(name).upper_bound) for name in band_names]
+
+def FT_File(data_file,sample_rate,band,gate_start=None,gate_stop=None,blank_file=None,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress,blank_mode="time"):
+    # The whole pipeline for one file. sample_rate in S/s, gates in microseconds (None means the start/end of the FID).
+    return FT_File_Bands(data_file,sample_rate,[band],gate_start,gate_stop,blank_file,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress,blank_mode)[0]
+
+def FT_File_Bands(data_file,sample_rate,bands,gate_start=None,gate_stop=None,blank_file=None,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress,blank_mode="time"):
+    # FT_File for a list of bands, with one read and one FT; returns a spectrum per band.
+    # Only the gate is read from data_file and blank_file (see Load_FID_Gate), so a short gate on a long record is cheap.
+    # blank_mode is "time" or "spectrum" (see Blank_Modes); either way the blank's gate (or spectrum) is cached for the next file.
+    (N1, N2) = Gate_For_Length(FID_Length(data_file),sample_rate,gate_start,gate_stop)
+    progress("Cutting FID!")
+    data = Load_FID_Gate(data_file,N1,N2)
+    return FT_Gate_Blanked(data,N1,N2,sample_rate,Band_Limits(bands),blank_file,blank_mode,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)
+
+def FT_Averaged(data_files,sample_rate,band,gate_start=None,gate_stop=None,blank_file=None,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,processes=1,progress=No_Progress,blank_mode="time"):
+    # Averages all of data_files (see Average_FIDs) and then FTs the average like FT_File would.
+    return FT_Averaged_Bands(data_files,sample_rate,[band],gate_start,gate_stop,blank_file,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,processes,progress,blank_mode)[0]
+
+def FT_Averaged_Bands(data_files,sample_rate,bands,gate_start=None,gate_stop=None,blank_file=None,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,processes=1,progress=No_Progress,blank_mode="time"):
+    # FT_Averaged for a list of bands; returns a spectrum per band.
+    progress("Averaging %d files!"%(len(data_files)))
+    (data, count, failures, elapsed) = Average_FIDs(data_files,processes)
+    for (file_name, reason) in failures:
+        progress("Skipped %s: %s"%(file_name, reason))
+    progress("Averaged %d files in %.1f s (%.1f files/s)."%(count, elapsed, count/elapsed if elapsed > 0.0 else 0.0))
+    return FT_Data_Bands(data,sample_rate,bands,gate_start,gate_stop,blank_file,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress,blank_mode)
+
+def FT_Data(data,sample_rate,band,gate_start=None,gate_stop=None,blank_file=None,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress,blank_mode="time"):
+    # FT_File for an FID that's already in memory (e.g. an average).
+    return FT_Data_Bands(data,sample_rate,[band],gate_start,gate_stop,blank_file,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress,blank_mode)[0]
+
+def FT_Data_Bands(data,sample_rate,bands,gate_start=None,gate_stop=None,blank_file=None,window_name="kaiser",window_param=9.5,zero_fill_policy="default",zero_fill_value=None,zoom_FT=False,progress=No_Progress,blank_mode="time"):
+    # FT_Data for a list of bands; returns a spectrum per band.
+    (N1, N2) = Gate_For_Length(data.size,sample_rate,gate_start,gate_stop)
+    progress("Cutting FID!")
+    return FT_Gate_Blanked(data[N1:N2],N1,N2,sample_rate,Band_Limits(bands),blank_file,blank_mode,window_name,window_param,zero_fill_policy,zero_fill_value,zoom_FT,progress)
+
+def Batch_Inputs(pattern): # A directory means every file in it; anything else is treated as a glob. Index/header sidecars are left out either way
+    if os.path.isdir(pattern):
+        file_names = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        file_names = [name for name in file_names if os.path.isfile(name)]
+    else:
+        file_names = glob.glob(pattern)
+    return sorted(name for name in file_names if not Is_FID_Sidecar(name))
+
+def Batch_Output_Name(data_file,output_dir,extension=None): # data/run12_0001.txt -> output_dir/run12_0001_FT.txt (or _FT.npy, etc.)
+    (base, data_extension) = os.path.splitext(os.path.basename(data_file))
+    if Is_Binary_FID(data_file): # A binary FID's extension says nothing about how to write a spectrum, so those default to text (run12_0001.i16 -> run12_0001_i16_FT.txt, so it can't clash with a run12_0001.txt)
+        (base, data_extension) = (base + "_" + data_extension[1:], ".txt")
+    return os.path.join(output_dir, base + "_FT" + (extension or data_extension or ".txt"))
+
+def FT_Batch_One(job): # Runs in a pool process, so it has to be a plain module-level function; never raises, just reports
+    (data_file, output_file, sample_rate, bands, FT_options) = job
+    start_time = time.time()
+    try:
+        Spectra = FT_File_Bands(data_file,sample_rate,bands,**FT_options)
+        output_files = Band_Output_Names(output_file,bands)
+        for (band_output_file, Spectrum) in zip(output_files,Spectra):
+            Write_Spectrum(band_output_file,Spectrum)
+    except Exception as e:
+        return (data_file, False, "%s: %s"%(type(e).__name__, e), time.time() - start_time)
+    return (data_file, True, ", ".join(output_files), time.time() - start_time)
+
+def FT_Batch(data_files,output_dir,sample_rate,band,processes=None,progress=No_Progress,output_extension=None,**FT_options):
+    # FTs every file in data_files with the same settings (FT_options are the keyword arguments of FT_File, e.g. blank_file and the gates).
+    # band can name several bands (see Band_Names), in which case each file gets a spectrum per band from a single FT.
+    # Each process keeps its own blank cache, so the shared blank is only read (and, with blank_mode="spectrum", FT'd) once per process, not once per file.
+    # Returns a list of (data file, succeeded, output file or error message, seconds) and writes a summary to output_dir.
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    bands = Band_Names(band)
+    jobs = [(data_file, Batch_Output_Name(data_file,output_dir,output_extension), sample_rate, bands, FT_options) for data_file in data_files]
+    start_time = time.time()
+    results = []
+
+    if (processes == 1) or (len(jobs) <= 1):
+        result_iterator = (FT_Batch_One(job) for job in jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes)
+        result_iterator = pool.imap_unordered(FT_Batch_One, jobs)
+
+    try:
+        for result in result_iterator:
+            results.append(result)
+            if result[1]:
+                progress("[%d/%d] %s -> %s (%.2f s)"%(len(results), len(jobs), result[0], result[2], result[3]))
+            else:
+                progress("[%d/%d] %s FAILED: %s"%(len(results), len(jobs), result[0], result[2]))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.time() - start_time
+    summary = Batch_Summary(results, elapsed, processes)
+    with open(os.path.join(output_dir, "FT_batch_summary.txt"), "w") as summary_file:
+        summary_file.write(summary)
+    progress(summary)
+    return results
+
+def Batch_Summary(results,elapsed,processes): # Throughput and failures, as text
+    succeeded = [result for result in results if result[1]]
+    failed = [result for result in results if not result[1]]
+    if (processes == 1) or (len(results) <= 1):
+        processes = 1
+    lines = ["%d files FT'd, %d failed, in %.1f s using %d process(es)"%(len(succeeded), len(failed), elapsed, processes or multiprocessing.cpu_count())]
+    if elapsed > 0.0:
+        lines.append("Throughput: %.2f files/s"%(len(results)/elapsed))
+    for result in sorted(failed):
+        lines.append("FAILED %s: %s"%(result[0], result[2]))
+    return "\n".join(lines) + "\n"
+
+Memory_Check_Lengths = [4096, 12345, 100000, 1 << 20] # Gate lengths (samples) that --check-memory tries
+Memory_Check_Policies = [("default", None), ("oversample", 4.0), ("fast", 8.0), ("memory", 100.0)]
+
+def Check_FT_Memory(gate_lengths=None,sample_rate=40e9,progress=No_Progress):
+    # Runs FT_Gated_Bands on random gates of each length, with each zero-fill policy and with zoom_FT, and measures the peak memory it
+    # allocates with tracemalloc (numpy reports its arrays to it). Returns a list of (gate length, policy, zoom_FT, peak bytes, estimate bytes)
+    # where the estimate is FT_Memory_Estimate or Zoom_Memory_Estimate, whichever the FT was sized by; the peak should never be more.
+    import tracemalloc # Python 3 only, and only needed here
+    if gate_lengths is None:
+        gate_lengths = Memory_Check_Lengths
+    band_limits = Band_Limits(list(Bands.keys()))
+    results = []
+    for Npts in gate_lengths:
+        full_FID = np.random.RandomState(0).standard_normal(Npts) # Made before tracing starts; the estimates don't count the gate itself
+        for (policy, value) in Memory_Check_Policies:
+            for zoom_FT in (False, True):
+                NumFreq = Zero_Fill_Length(Npts,policy,value,sample_rate)
+                if zoom_FT:
+                    estimate = max(Zoom_Memory_Estimate(Npts,NumFreq,sample_rate,PDRO,lower_bound,upper_bound) for (PDRO, lower_bound, upper_bound) in band_limits[:1])
+                else:
+                    estimate = FT_Memory_Estimate(Npts,NumFreq)
+                window_cache.clear() # Nothing left over from the last run, so the window and FT buffer are counted like on a first FT
+                with FT_buffer_lock:
+                    del spare_FT_buffers[:]
+                tracemalloc.start()
+                try:
+                    FT_Gated_Bands(full_FID,sample_rate,band_limits[:1],"kaiser",9.5,policy,value,zoom_FT)
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                progress("%8d points, %-10s %-4s: peak %8.1f MB, estimate %8.1f MB%s"%(Npts, policy, "zoom" if zoom_FT else "full", peak/1e6, estimate/1e6, "" if peak <= estimate else "  <-- over"))
+                results.append((Npts, policy, zoom_FT, peak, estimate))
+    return results
+
+def Make_Argument_Parser():
+    parser = argparse.ArgumentParser(description="Fourier transform a time-domain FID without the GUI.")
+    parser.add_argument("data_file", nargs="?", help="FID to transform (with --batch, a directory or glob of FIDs)")
+    parser.add_argument("output_file", nargs="?", help="where to write the spectrum (with --batch, the output directory)")
+    parser.add_argument("--check-memory", action="store_true", help="instead of an FT, check that the peak memory of test FTs stays within the memory estimates (Python 3)")
+    parser.add_argument("--sample-rate", type=float, default=40.0, help="sample rate in GS/s (default 40)")
+    parser.add_argument("--band", help="%s, a comma-separated list of them or all; with more than one band, each gets its own output file (e.g. spectrum_high.txt) from a single FT"%(", ".join(Bands.keys())))
+    parser.add_argument("--gate-start", type=float, default=None, help="gate start in microseconds (default: start of the FID)")
+    parser.add_argument("--gate-stop", type=float, default=None, help="gate stop in microseconds (default: end of the FID)")
+    parser.add_argument("--blank", default=None, help="blank FID to subtract before the FT")
+    parser.add_argument("--blank-mode", choices=[mode[1] for mode in Blank_Modes], default="time", help="subtract the blank FID before the FT (time, the default) or its cached magnitude spectrum after (spectrum); spectrum is much cheaper for --batch but ignores phase")
+    parser.add_argument("--window", choices=[window[1] for window in Window_Functions], default="kaiser")
+    parser.add_argument("--window-param", type=float, default=9.5, help="Kaiser beta (default 9.5)")
+    parser.add_argument("--zero-fill", choices=[policy[1] for policy in Zero_Fill_Policies], default="default")
+    parser.add_argument("--zero-fill-value", type=float, default=None, help="factor, kHz or MB, depending on --zero-fill")
+    parser.add_argument("--zoom", action="store_true", help="band-limited (chirp-z) FT")
+    parser.add_argument("--batch", action="store_true", help="FT every file matching data_file into the output_file directory")
+    parser.add_argument("--output-format", choices=list(Spectrum_Writers.keys()), default=None, help="file type for --batch output (default: same extension as the input); otherwise the output_file extension decides")
+    parser.add_argument("--average", action="store_true", help="average every file matching data_file, then FT the average into output_file")
+    parser.add_argument("--processes", type=int, default=None, help="number of processes for --batch/--average (default: one per CPU); each needs the memory of a full FT (--batch) or one record (--average)")
+    parser.add_argument("--no-index-sidecars", action="store_true", help="don't write .idx.npz line indexes next to text FIDs (same as setting $%s to 0)"%(Index_Sidecar_Variable))
+    return parser
+
+def main(argv=None):
+    parser = Make_Argument_Parser()
+    args = parser.parse_args(argv)
+    if args.check_memory:
+        results = Check_FT_Memory(sample_rate=args.sample_rate*1e9,progress=print)
+        over = [result for result in results if result[3] > result[4]]
+        print("%d of %d FTs went over their memory estimate."%(len(over), len(results)))
+        return 1 if over else 0
+    if (args.data_file is None) or (args.output_file is None) or (args.band is None):
+        parser.error("data_file, output_file and --band are required")
+    if args.no_index_sidecars:
+        os.environ[Index_Sidecar_Variable] = "0" # In the environment rather than a flag so the --batch/--average processes see it too
+    if (args.zero_fill != "default") and (args.zero_fill_value is None):
+        args.zero_fill_value = float([policy[2] for policy in Zero_Fill_Policies if policy[1] == args.zero_fill][0])
+    if (args.zero_fill_value is not None) and (args.zero_fill_value <= 0.0):
+        parser.error("--zero-fill-value should be greater than zero")
+    window_param = args.window_param if args.window == "kaiser" else None
+    try:
+        bands = Band_Names(args.band)
+        if not args.batch:
+            for output_file in Band_Output_Names(args.output_file,bands):
+                Check_Output_Name(output_file)
+    except ValueError as e:
+        print("Error: %s"%(e), file=sys.stderr)
+        return 1
+    if args.batch:
+        data_files = Batch_Inputs(args.data_file)
+        if len(data_files) == 0:
+            print("Error: no files match %s"%(args.data_file), file=sys.stderr)
+            return 1
+        results = FT_Batch(data_files,args.output_file,args.sample_rate*1e9,args.band,args.processes,print,args.output_format,gate_start=args.gate_start,gate_stop=args.gate_stop,blank_file=args.blank,
+            window_name=args.window,window_param=window_param,zero_fill_policy=args.zero_fill,zero_fill_value=args.zero_fill_value,zoom_FT=args.zoom,blank_mode=args.blank_mode)
+        return 0 if all(result[1] for result in results) else 1
+    try:
+        if args.average:
+            data_files = Batch_Inputs(args.data_file)
+            if len(data_files) == 0:
+                print("Error: no files match %s"%(args.data_file), file=sys.stderr)
+                return 1
+            Spectra = FT_Averaged_Bands(data_files,args.sample_rate*1e9,bands,args.gate_start,args.gate_stop,args.blank,args.window,window_param,args.zero_fill,args.zero_fill_value,args.zoom,args.processes,progress=print,blank_mode=args.blank_mode)
+        else:
+            Spectra = FT_File_Bands(args.data_file,args.sample_rate*1e9,bands,args.gate_start,args.gate_stop,args.blank,args.window,window_param,args.zero_fill,args.zero_fill_value,args.zoom,progress=print,blank_mode=args.blank_mode)
+    except (IOError, OSError, ValueError) as e:
+        print("Error: %s"%(e), file=sys.stderr)
+        return 1
+    print("FT is complete! Now writing to file!")
+    try:
+        for (output_file, Spectrum) in zip(Band_Output_Names(args.output_file,bands),Spectra):
+            Write_Spectrum(output_file,Spectrum)
+    except (IOError, OSError, ValueError) as e:
+        print("Error: %s"%(e), file=sys.stderr)
+        return 1
+    print("Finished!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
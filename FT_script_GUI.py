@@ -13,8 +13,8 @@ from functools import partial
 import numpy as np
 import math
 import matplotlib
+import os
 import sys
-import copy
 matplotlib.use("Qt5Agg")
 
 import matplotlib.pyplot as plt
@@ -23,13 +23,19 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from matplotlib.figure import Figure
 from matplotlib import rcParams
 
+from FID_io import Load_FID, Load_Rate_Message, Time_Axis, FID_Overview, Max_Plot_Points
+from Band_table import Bands, All_Bands_Text, Band_Names, Band_Texts
+from FT_engine import Band_Limits, Band_Output_Names, Zero_Fill_Policies, Window_Functions, Blank_Modes, Gate_Indices, FT_File_Gate_Bands, Spectrum_Writers, Check_Output_Name, Write_Spectrum
+
 class Ui_Dialog_First_Window(object):
     def setupUi(self, Dialog):
 
         global FID
         global xdata
+        global FID_file
         global blank_FID
         global blank_xdata
+        global blank_FID_file
         global gate_start
         global gate_stop
         global plot_switch
@@ -52,8 +58,10 @@ class Ui_Dialog_First_Window(object):
         self.gridLayout.addWidget(self.band_select_label, 0, 2, 1, 1)
         self.band_select = QtWidgets.QComboBox(Dialog)
         self.band_select.setObjectName("band_select") # Do we have to add a function to deal with it if someone changes the value? No, we only read from this right before using the data, so it should just work.
-        self.band_select.setToolTip("This is the band in which the data was collected.")
-        self.band_select.addItems(["Low (8.7-13.5 GHz)", "Medium (13.5-18.3 GHz)", "High (18.0-26.5 GHz)"])
+        band_suffixes = ["_" + name for name in Bands] # From bands.json too, like the entries
+        band_suffixes = " and ".join([", ".join(band_suffixes[:-1]), band_suffixes[-1]]) if len(band_suffixes) > 1 else "".join(band_suffixes)
+        self.band_select.setToolTip("This is the band in which the data was collected.\n%s FTs the FID once and writes each band's spectrum to its own file (export name with %s added)."%(All_Bands_Text, band_suffixes))
+        self.band_select.addItems(Band_Texts() + [All_Bands_Text]) # From bands.json, if there is one
         self.gridLayout.addWidget(self.band_select, 0, 3, 1, 2)
         self.use_blank_cb = QtWidgets.QCheckBox(Dialog)
         self.use_blank_cb.setObjectName("use_blank_cb")
@@ -93,81 +101,121 @@ class Ui_Dialog_First_Window(object):
         self.font_minus_button.clicked.connect(partial(self.font_minus,Dialog))
         self.gridLayout.addWidget(self.font_minus_button, 1, 6, 1, 1)
 
-        self.gridLayout.addWidget(QHLine(), 2, 0, 1, 7)
+        self.zero_fill_label = QtWidgets.QLabel(Dialog)
+        self.zero_fill_label.setObjectName("zero_fill_label")
+        self.gridLayout.addWidget(self.zero_fill_label, 2, 0, 1, 1)
+        self.zero_fill_select = QtWidgets.QComboBox(Dialog)
+        self.zero_fill_select.setObjectName("zero_fill_select")
+        self.zero_fill_select.setToolTip("How far to zero-fill the gated FID before the FT.\n16x: the original behavior, 2^(ceil(log2 N)+4) points.\nOversample: next power of 2 at least (value) times the gate length.\nPoint Spacing: enough points for a spacing of at most (value) kHz.\nFast Length: next 2/3/5-smooth length at least (value) times the gate length.\nMemory Budget: the largest power of 2 (up to 16x) whose FT fits in (value) MB.")
+        self.zero_fill_select.addItems([policy[0] for policy in Zero_Fill_Policies])
+        self.zero_fill_select.currentIndexChanged.connect(self.zero_fill_change)
+        self.gridLayout.addWidget(self.zero_fill_select, 2, 1, 1, 2)
+        self.zero_fill_value_input = QtWidgets.QLineEdit(Dialog)
+        self.zero_fill_value_input.setObjectName("zero_fill_value_input")
+        self.zero_fill_value_input.setToolTip("Value for the zero-fill option (factor, kHz, or MB, depending on the option chosen).")
+        self.zero_fill_value_input.setEnabled(False) # Not needed for the default
+        self.gridLayout.addWidget(self.zero_fill_value_input, 2, 3, 1, 1)
+        self.window_label = QtWidgets.QLabel(Dialog)
+        self.window_label.setObjectName("window_label")
+        self.gridLayout.addWidget(self.window_label, 2, 4, 1, 1)
+        self.window_select = QtWidgets.QComboBox(Dialog)
+        self.window_select.setObjectName("window_select")
+        self.window_select.setToolTip("Window function applied to the gated FID before the FT.")
+        self.window_select.addItems([window[0] for window in Window_Functions])
+        self.window_select.currentIndexChanged.connect(self.window_change)
+        self.gridLayout.addWidget(self.window_select, 2, 5, 1, 1)
+        self.window_param_input = QtWidgets.QLineEdit(Dialog)
+        self.window_param_input.setObjectName("window_param_input")
+        self.window_param_input.setToolTip("Window parameter (beta, for the Kaiser window).")
+        self.window_param_input.setText(Window_Functions[0][2]) # Default value (Kaiser, beta = 9.5)
+        self.gridLayout.addWidget(self.window_param_input, 2, 6, 1, 1)
+
+        self.gridLayout.addWidget(QHLine(), 3, 0, 1, 7)
 
         self.file_import_label = QtWidgets.QLabel(Dialog)
         self.file_import_label.setObjectName("file_import_label")
-        self.gridLayout.addWidget(self.file_import_label, 3, 0, 1, 1)
+        self.gridLayout.addWidget(self.file_import_label, 4, 0, 1, 1)
         self.file_import_input = QtWidgets.QLineEdit(Dialog)
         self.file_import_input.setObjectName("file_import_input")
         self.file_import_input.setToolTip("Name of the data file to be loaded and processed.")
-        self.gridLayout.addWidget(self.file_import_input, 3, 1, 1, 3)
+        self.gridLayout.addWidget(self.file_import_input, 4, 1, 1, 3)
         self.browse_import_button = QtWidgets.QPushButton(Dialog)
         self.browse_import_button.setObjectName("browse_import_button")
         self.browse_import_button.clicked.connect(self.browse)
-        self.gridLayout.addWidget(self.browse_import_button, 3, 4, 1, 1)
+        self.gridLayout.addWidget(self.browse_import_button, 4, 4, 1, 1)
         self.load_button = QtWidgets.QPushButton(Dialog)
         self.load_button.setObjectName("load_button")
         self.load_button.clicked.connect(self.load_input)
-        self.gridLayout.addWidget(self.load_button, 3, 5, 1, 1)
+        self.gridLayout.addWidget(self.load_button, 4, 5, 1, 1)
         self.load_button.setEnabled(False)
         self.plot_button = QtWidgets.QPushButton(Dialog)
         self.plot_button.setObjectName("plot_button")
         self.plot_button.clicked.connect(self.plot_input)
-        self.gridLayout.addWidget(self.plot_button, 3, 6, 1, 1)
+        self.gridLayout.addWidget(self.plot_button, 4, 6, 1, 1)
         self.plot_button.setEnabled(False)
 
         self.blank_import_label = QtWidgets.QLabel(Dialog)
         self.blank_import_label.setObjectName("blank_import_label")
-        self.gridLayout.addWidget(self.blank_import_label, 4, 0, 1, 1)
+        self.gridLayout.addWidget(self.blank_import_label, 5, 0, 1, 1)
         self.blank_import_input = QtWidgets.QLineEdit(Dialog)
         self.blank_import_input.setObjectName("blank_import_input")
         self.blank_import_input.setToolTip("Name of the data file (blank) to be loaded and processed.")
-        self.gridLayout.addWidget(self.blank_import_input, 4, 1, 1, 3)
+        self.gridLayout.addWidget(self.blank_import_input, 5, 1, 1, 3)
         self.blank_import_input.setEnabled(False)
         self.browse_import_blank_button = QtWidgets.QPushButton(Dialog)
         self.browse_import_blank_button.setObjectName("browse_import_blank_button")
         self.browse_import_blank_button.clicked.connect(self.browse_blank)
-        self.gridLayout.addWidget(self.browse_import_blank_button, 4, 4, 1, 1)
+        self.gridLayout.addWidget(self.browse_import_blank_button, 5, 4, 1, 1)
         self.browse_import_blank_button.setEnabled(False)
         self.load_blank_button = QtWidgets.QPushButton(Dialog)
         self.load_blank_button.setObjectName("load_blank_button")
         self.load_blank_button.clicked.connect(self.load_blank_input) # May instead want to pass a value to a more generic function...
-        self.gridLayout.addWidget(self.load_blank_button, 4, 5, 1, 1)
+        self.gridLayout.addWidget(self.load_blank_button, 5, 5, 1, 1)
         self.load_blank_button.setEnabled(False)
         self.plot_blank_button = QtWidgets.QPushButton(Dialog)
         self.plot_blank_button.setObjectName("plot_blank_button")
         self.plot_blank_button.clicked.connect(self.plot_blank_input) # May instead want to pass a value to a more generic function...
-        self.gridLayout.addWidget(self.plot_blank_button, 4, 6, 1, 1)
+        self.gridLayout.addWidget(self.plot_blank_button, 5, 6, 1, 1)
         self.plot_blank_button.setEnabled(False)
 
         self.file_export_label = QtWidgets.QLabel(Dialog)
         self.file_export_label.setObjectName("file_export_label")
-        self.gridLayout.addWidget(self.file_export_label, 5, 0, 1, 1)
+        self.gridLayout.addWidget(self.file_export_label, 6, 0, 1, 1)
         self.file_export_input = QtWidgets.QLineEdit(Dialog)
         self.file_export_input.setObjectName("file_export_input")
-        self.file_export_input.setToolTip("Name of the file that data will be saved to.")
-        self.gridLayout.addWidget(self.file_export_input, 5, 1, 1, 3)
+        self.file_export_input.setToolTip("Name of the file that data will be saved to.\nThe extension picks the format: .txt/.csv (text), .npy, .f32/.f64 (raw binary + .hdr), .h5 (HDF5, only if h5py is installed).")
+        self.gridLayout.addWidget(self.file_export_input, 6, 1, 1, 3)
         self.browse_export_button = QtWidgets.QPushButton(Dialog)
         self.browse_export_button.setObjectName("browse_export_button")
         self.browse_export_button.clicked.connect(self.browse_export)
-        self.gridLayout.addWidget(self.browse_export_button, 5, 4, 1, 1)
-
-        self.gridLayout.addWidget(QHLine(), 6, 0, 1, 7)
+        self.gridLayout.addWidget(self.browse_export_button, 6, 4, 1, 1)
+        self.zoom_FT_cb = QtWidgets.QCheckBox(Dialog)
+        self.zoom_FT_cb.setObjectName("zoom_FT_cb")
+        self.zoom_FT_cb.setToolTip("If checked, only calculate the FT within the selected band (chirp-z transform).\nThis needs about a quarter to a third less peak memory than the full FT at the default zero fill, but it isn't faster\n(about the same or a little slower, since each band still covers about a third of the spectrum); the result matches the full FT to within rounding error.")
+        self.zoom_FT_cb.setText("Band-Limited FT")
+        self.gridLayout.addWidget(self.zoom_FT_cb, 6, 5, 1, 1)
+        self.blank_mode_select = QtWidgets.QComboBox(Dialog)
+        self.blank_mode_select.setObjectName("blank_mode_select")
+        self.blank_mode_select.setToolTip("How the blank is subtracted.\nSubtract FID: from the gated data, before the FT (the original behavior).\nSubtract Spectrum: the blank's magnitude spectrum is taken off the data spectrum after the FT.\nThe blank is only FT'd once for as long as it and the FT settings stay the same, but phase is ignored, so the result isn't identical.")
+        self.blank_mode_select.addItems([mode[0] for mode in Blank_Modes])
+        self.blank_mode_select.setEnabled(False) # Only matters with a blank
+        self.gridLayout.addWidget(self.blank_mode_select, 6, 6, 1, 1)
+
+        self.gridLayout.addWidget(QHLine(), 7, 0, 1, 7)
 
         self.FT_data_button = QtWidgets.QPushButton(Dialog)
         self.FT_data_button.setObjectName("FT_data_button")
         self.FT_data_button.clicked.connect(self.FT)
-        self.gridLayout.addWidget(self.FT_data_button, 7, 0, 1, 4)
+        self.gridLayout.addWidget(self.FT_data_button, 8, 0, 1, 4)
         self.FT_data_button.setEnabled(False)
         self.exit_button = QtWidgets.QPushButton(Dialog)
         self.exit_button.setObjectName("exit_button")
         self.exit_button.clicked.connect(app.quit) # Probably should interrupt if haven't saved yet
 
-        self.gridLayout.addWidget(self.exit_button, 7, 4, 1, 2)
+        self.gridLayout.addWidget(self.exit_button, 8, 4, 1, 2)
         self.indicator = QtWidgets.QPushButton(Dialog) # Hacking a push button to be a status indicator
         self.indicator.setObjectName("indicator")
-        self.gridLayout.addWidget(self.indicator, 7, 6, 1, 1)
+        self.gridLayout.addWidget(self.indicator, 8, 6, 1, 1)
         self.indicator.setEnabled(False)
         self.indicator.setStyleSheet("background-color:rgb(255,255,255); color:rgb(0,0,0); border: none")
         self.indicator.setText("Not Ready")
@@ -175,7 +223,7 @@ class Ui_Dialog_First_Window(object):
         
         self.status_window = QtWidgets.QTextEdit(Dialog)
         self.status_window.setObjectName("status_window")
-        self.gridLayout.addWidget(self.status_window, 8, 0, 5, 7) # make it big!!!!
+        self.gridLayout.addWidget(self.status_window, 9, 0, 5, 7) # make it big!!!!
         self.status_window.setReadOnly(True)
 
         self.font_plus_button.shortcut = QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl++"), self.font_plus_button)
@@ -233,6 +281,8 @@ class Ui_Dialog_First_Window(object):
         self.plot_blank_button.setText(_translate("Dialog", "Plot Blank"))
         self.gate_start_label.setText(_translate("Dialog", "Gate Start (us)"))
         self.gate_stop_label.setText(_translate("Dialog", "Gate Stop (us)"))
+        self.zero_fill_label.setText(_translate("Dialog", "Zero Fill"))
+        self.window_label.setText(_translate("Dialog", "Window"))
         self.file_export_label.setText(_translate("Dialog", "Output File Name"))
         self.browse_export_button.setText(_translate("Dialog", "Browse Output"))
         self.FT_data_button.setText(_translate("Dialog", "Fourier Transform!"))
@@ -254,6 +304,16 @@ class Ui_Dialog_First_Window(object):
         self.indicator.setFont(font)
         Dialog.setFont(font)
 
+    def zero_fill_change(self): # Puts a sensible default value in the box for whichever zero-fill option was picked
+        policy = Zero_Fill_Policies[self.zero_fill_select.currentIndex()]
+        self.zero_fill_value_input.setText(policy[2])
+        self.zero_fill_value_input.setEnabled(policy[1] != "default")
+
+    def window_change(self): # Same idea for the window function; only the Kaiser window has a parameter
+        window = Window_Functions[self.window_select.currentIndex()]
+        self.window_param_input.setText(window[2])
+        self.window_param_input.setEnabled(window[2] != "")
+
     def browse(self):
         fileName, _ = QtWidgets.QFileDialog.getOpenFileName()
         if fileName:
@@ -272,8 +332,11 @@ class Ui_Dialog_First_Window(object):
             self.plot_blank_button.setEnabled(False)
             self.are_we_there_yet()
 
-    def browse_export(self):
-        fileName, _ = QtWidgets.QFileDialog.getSaveFileName()
+    def browse_export(self): # The output format is picked by the file extension (see Spectrum_Writers); plain text if there isn't a recognized one
+        filters = ["%s (*%s)"%(Spectrum_Writers[extension][0], extension) for extension in Spectrum_Writers]
+        fileName, chosen_filter = QtWidgets.QFileDialog.getSaveFileName(filter=";;".join(filters))
+        if fileName and (os.path.splitext(fileName)[1] == "") and chosen_filter: # Some platforms don't add the extension for you
+            fileName = fileName + chosen_filter[chosen_filter.index("*")+1:-1]
         if fileName:
             self.file_export_input.setText(fileName)
             self.are_we_there_yet()
@@ -294,8 +357,10 @@ class Ui_Dialog_First_Window(object):
         if use_blank:
             self.browse_import_blank_button.setEnabled(True)
             self.blank_import_input.setEnabled(True)
+            self.blank_mode_select.setEnabled(True)
         else:
             self.browse_import_blank_button.setEnabled(False)
+            self.blank_mode_select.setEnabled(False)
             self.load_blank_button.setEnabled(False)
             self.plot_blank_button.setEnabled(False)
             self.blank_import_input.setEnabled(False)
@@ -385,8 +450,10 @@ class Ui_Dialog_First_Window(object):
     def loader(self,which_one):
         global FID
         global xdata
+        global FID_file
         global blank_FID
         global blank_xdata
+        global blank_FID_file
 
         try:
             sample_rate = float(self.sample_rate_input.text())*1e9
@@ -396,10 +463,6 @@ class Ui_Dialog_First_Window(object):
             self.sample_rate_input.setFocus()
             return 0
 
-        row_counter = 0
-        temp_FID = []
-        temp_xdata = []
-
         if which_one == "data":
             file_to_open = self.file_import_input.text()
 
@@ -407,18 +470,16 @@ class Ui_Dialog_First_Window(object):
             file_to_open = self.blank_import_input.text()
 
         try:
-            data_input_file = open(file_to_open)
+            open(file_to_open).close()
         except:
             self.error_message = "%s couldn't be opened. Try again with a different file."%(file_to_open)
             self.raise_error()
             return 0
 
         try:
-            for row in data_input_file:
-                temp=row.split()
-                temp_FID.append(float(temp[np.size(temp)-1]))
-                temp_xdata.append((row_counter/sample_rate)*1e6) # to put it in microseconds
-                row_counter += 1
+            data_set = Load_FID(file_to_open)
+            temp_FID = data_set.FID
+            temp_xdata = Time_Axis(sample_rate, temp_FID.size) # in microseconds, computed on demand rather than stored
             if self.full_FID_cb.isChecked():
                 self.gate_start_input.setText(str(temp_xdata[0]))
                 self.gate_stop_input.setText(str(temp_xdata[-1]))
@@ -430,15 +491,19 @@ class Ui_Dialog_First_Window(object):
             return 0
         else:
             if which_one == "data":
-                FID = copy.copy(temp_FID)
-                xdata = copy.copy(temp_xdata)
-                self.status_window.append("Data file loaded successfully!")
+                FID = temp_FID
+                xdata = temp_xdata
+                FID_file = data_set.file_name
+                self.data_set = data_set
+                self.status_window.append("Data file loaded successfully! (%s)"%(Load_Rate_Message(FID.size, data_set.load_time)))
                 self.plot_button.setEnabled(True)
                 self.are_we_there_yet()
             else:
-                blank_FID = copy.copy(temp_FID)
-                blank_xdata = copy.copy(temp_xdata)
-                self.status_window.append("Blank file loaded successfully!")
+                blank_FID = temp_FID
+                blank_xdata = temp_xdata
+                blank_FID_file = data_set.file_name
+                self.blank_set = data_set
+                self.status_window.append("Blank file loaded successfully! (%s)"%(Load_Rate_Message(blank_FID.size, data_set.load_time)))
                 self.plot_blank_button.setEnabled(True)
                 self.are_we_there_yet()
 
@@ -544,6 +609,37 @@ class Ui_Dialog_First_Window(object):
             self.gate_start_input.setFocus()
             return 0
 
+        zero_fill_policy = Zero_Fill_Policies[self.zero_fill_select.currentIndex()][1]
+
+        if zero_fill_policy == "default":
+            zero_fill_value = None
+        else:
+            try:
+                zero_fill_value = float(self.zero_fill_value_input.text())
+            except:
+                self.error_message = "Zero fill value should be a float!"
+                self.raise_error()
+                self.zero_fill_value_input.setFocus()
+                return 0
+            if zero_fill_value <= 0.0:
+                self.error_message = "Zero fill value should be greater than zero!"
+                self.raise_error()
+                self.zero_fill_value_input.setFocus()
+                return 0
+
+        window_name = Window_Functions[self.window_select.currentIndex()][1]
+
+        if Window_Functions[self.window_select.currentIndex()][2] == "":
+            window_param = None
+        else:
+            try:
+                window_param = float(self.window_param_input.text())
+            except:
+                self.error_message = "Window parameter should be a float!"
+                self.raise_error()
+                self.window_param_input.setFocus()
+                return 0
+
         if gate_start < 0.0:
             self.gate_start_input.setText('0.0')
             gate_start = 0.0
@@ -552,36 +648,49 @@ class Ui_Dialog_First_Window(object):
             self.gate_stop_input.setText(str(xdata[-1]))
             gate_stop = xdata[-1]
 
+        if gate_start >= gate_stop: # Only happens when the gate starts past the end of the FID
+            self.error_message = "Gate start is past the end of the FID (%g us)! Please correct this and try again."%(xdata[-1])
+            self.raise_error()
+            self.gate_start_input.setFocus()
+            return 0
 
-        band = self.band_select.currentText()
 
-        if (band=="Low (8.7-13.5 GHz)"):
-            PDRO = 13600
-            lower_bound = 8000.0
-            upper_bound = 13500.0
-        if (band=="Medium (13.5-18.3 GHz)"):
-            PDRO = 18400
-            lower_bound = 13500.0
-            upper_bound = 18000.0
-        if (band=="High (18.0-26.5 GHz)"):
-            PDRO = 27200
-            lower_bound = 18000.0
-            upper_bound = 26500.0
+        band_names = Band_Names(self.band_select.currentText())
 
-        N1 = int(np.floor(gate_start*sample_rate*(10**-6)))
-        N2 = int(np.floor(gate_stop*sample_rate*(10**-6)))
+        band_limits = Band_Limits(band_names) # (PDRO, lower_bound, upper_bound) for each band
 
-        datafile = self.file_import_input.text()
+        (N1, N2) = Gate_Indices(gate_start,gate_stop,sample_rate)
+
+        if N1 >= N2:
+            self.error_message = "The gate is shorter than one sample! Please correct this and try again."
+            self.raise_error()
+            self.gate_stop_input.setFocus()
+            return 0
+
+        data_set = self.data_set # Already parsed by loader(); the worker only re-parses if the file changed on disk since then
 
         if use_blank:
-            blankfile = self.blank_import_input.text()
+            blank_set = self.blank_set
         else:
-            blankfile = ''
+            blank_set = None
+
+        export_file_names = Band_Output_Names(self.file_export_input.text(), band_names)
 
-        export_file_name = self.file_export_input.text()
+        try: # Found out now rather than after the FT
+            for export_file_name in export_file_names:
+                Check_Output_Name(export_file_name)
+        except ValueError as e:
+            self.error_message = str(e)
+            self.raise_error()
+            self.file_export_input.setFocus()
+            return 0
+
+        zoom_FT = self.zoom_FT_cb.isChecked()
+
+        blank_mode = Blank_Modes[self.blank_mode_select.currentIndex()][1]
 
         thread = self.thread = QtCore.QThread()
-        worker = self.worker = Worker(datafile, gate_start, gate_stop, sample_rate, use_blank, PDRO, lower_bound, upper_bound, N1, N2, blankfile, export_file_name) # give it whatever arguments it needs
+        worker = self.worker = Worker(data_set, gate_start, gate_stop, sample_rate, use_blank, band_limits, N1, N2, blank_set, export_file_names, zoom_FT, zero_fill_policy, zero_fill_value, window_name, window_param, blank_mode) # give it whatever arguments it needs
         worker.moveToThread(thread)
         thread.started.connect(worker.run)
         worker.progress.connect(self.progress_update)
@@ -618,76 +727,61 @@ class Ui_Dialog_First_Window(object):
 
 class Worker(QtCore.QObject): # looks like we need to use threading in order to get progress bars to update!
 # Thanks go to this thread: https://gis.stackexchange.com/questions/64831/how-do-i-prevent-qgis-from-being-detected-as-not-responding-when-running-a-hea
-    def __init__(self, datafile, gate_start, gate_stop, sample_rate, use_blank, PDRO, lower_bound, upper_bound, N1, N2, blankfile, export_file_name, *args, **kwargs):
+    def __init__(self, data_set, gate_start, gate_stop, sample_rate, use_blank, band_limits, N1, N2, blank_set, export_file_names, zoom_FT=False, zero_fill_policy="default", zero_fill_value=None, window_name="kaiser", window_param=9.5, blank_mode="time", *args, **kwargs):
         QtCore.QObject.__init__(self, *args, **kwargs)
-        self.datafile = datafile
+        self.data_set = data_set
         self.gate_start = gate_start
         self.gate_stop = gate_stop
         self.sample_rate = sample_rate
         self.use_blank = use_blank
-        self.PDRO = PDRO
-        self.lower_bound = lower_bound
-        self.upper_bound = upper_bound
+        self.band_limits = band_limits # One (PDRO, lower_bound, upper_bound) per band; they all come from the same FT
         self.N1 = N1
         self.N2 = N2
-        self.blankfile = blankfile
-        self.export_file_name = export_file_name
+        self.blank_set = blank_set
+        self.export_file_names = export_file_names # One per band
+        self.zoom_FT = zoom_FT
+        self.zero_fill_policy = zero_fill_policy
+        self.zero_fill_value = zero_fill_value
+        self.window_name = window_name
+        self.window_param = window_param
+        self.blank_mode = blank_mode
 
     def run(self):
         self.indicator.emit(0)
         np.set_printoptions(formatter={'float_kind':'{:f}'.format})
 
-        self.progress.emit("Cutting FID!")
-
-        data = np.fromfile(self.datafile,sep = " ")
-        data_cut = data[self.N1:self.N2]
+        self.indicator.emit(1)
 
         if self.use_blank:
-            self.progress.emit("Subtracting FID!")
-            blank = np.fromfile(self.blankfile, sep = " ")
-            blank_cut = blank[self.N1:self.N2]
-
-        if self.use_blank: # Emit an error message to the outside if blank subtraction doesn't work.
-            try:
-                full_FID = np.subtract(data_cut, blank_cut)
-            except:
-                self.error.emit("Subtraction of blank from data didn't work! This probably happened because they don't have the same number of rows.")
-                return 0
+            blank_file = self.blank_set.file_name
         else:
-            full_FID = data_cut
-
-        #CUT_blanks = blank1[N1:N2] # Maybe later add a thing that lets us choose to save an FT of the blank if we want to as well (though it's kind of a pain...)
-
-        self.indicator.emit(1)
-        self.progress.emit("Applying window function!")
+            blank_file = None
 
-        Npts = full_FID.size
-        Kaiser = np.kaiser(Npts,9.5) # Applies a Kaiser-Bessel windowing function; beta value is currently hard-coded, though this could be changed in the future.
-        FID_Kaiser = Correct_FID_Length_Window(full_FID,Kaiser)
-
-        self.progress.emit("Taking FT of data!")
-
-        Spectrum_Kaiser = Freq_Spectrum(FID_Kaiser,self.sample_rate,self.PDRO)
-
-        #NoWindow = np.full(Npts,1) # Maybe later we might decide whether or not to have users choose whether or not to use a window
-        #FID_None = Correct_FID_Length_Window(CUT,NoWindow)  
-        #Spectrum_None = Freq_Spectrum(FID_None,sample_rate,PDRO)
-
-        low_index = 0
-        high_index = 0
+        try: # The last few FTs are kept, so going back over the same files with a different band (or the same gate again) doesn't redo the FT
+            Spectra = FT_File_Gate_Bands(self.data_set.file_name,self.N1,self.N2,self.sample_rate,self.band_limits,blank_file,self.blank_mode,self.window_name,self.window_param,self.zero_fill_policy,self.zero_fill_value,self.zoom_FT,self.progress.emit)
+        except ValueError as e: # Emit an error message to the outside if blank subtraction doesn't work.
+            self.error.emit(str(e))
+            return 0
+        except (IOError, OSError):
+            self.error.emit("%s couldn't be re-read; it may have been moved or changed. Try loading it again."%(" or ".join(name for name in (self.data_set.file_name, blank_file) if name)))
+            return 0
+        except MemoryError:
+            self.error.emit("Ran out of memory during the FT! Try a shorter gate or less zero filling.")
+            return 0
+        except Exception as e: # Anything else is a bug, so say what it was rather than blaming the files
+            self.error.emit("The FT failed with %s: %s"%(type(e).__name__, e))
+            return 0
 
-        for i in range(len(Spectrum_Kaiser)): # lower_bound and upper_bound are set by the band variable; this prunes output to just relevant frequency ranges for each band
-            if (low_index == 0) and (Spectrum_Kaiser[i][0] >= self.lower_bound):
-                low_index = i
-                continue
-            if (high_index == 0) and (Spectrum_Kaiser[i][0] >= self.upper_bound):
-                high_index = i
-                break
+        #CUT_blanks = blank1[N1:N2] # Maybe later add a thing that lets us choose to save an FT of the blank if we want to as well (though it's kind of a pain...)
 
-        Spectrum_Kaiser = Spectrum_Kaiser[low_index:high_index]
         self.progress.emit("FT is complete! Now writing to file!")
 
-        np.savetxt(self.export_file_name, Spectrum_Kaiser, delimiter=', ')
+        for (export_file_name, Spectrum) in zip(self.export_file_names, Spectra):
+            try:
+                Write_Spectrum(export_file_name, Spectrum)
+            except Exception as e:
+                self.error.emit("Couldn't write %s: %s"%(export_file_name, e))
+                return 0
 
         self.progress.emit("Finished!")
         self.indicator.emit(2)
@@ -725,9 +819,14 @@ class PlotCanvas(FigureCanvas):
     def plot(self):
         ax = self.figure.add_subplot(111)
         if plot_switch == "data":
-            ax.plot(xdata,FID,'-')
+            (plot_xdata, plot_FID, plot_file) = (xdata, FID, FID_file)
         else:
-            ax.plot(blank_xdata,blank_FID,'-')
+            (plot_xdata, plot_FID, plot_file) = (blank_xdata, blank_FID, blank_FID_file)
+        overview = FID_Overview(plot_file) if plot_FID.size > Max_Plot_Points else None
+        if overview is None:
+            ax.plot(plot_xdata.values(),plot_FID,'-')
+        else: # Too many points to draw one by one; the min/max of each block of rows from the line index looks the same until you zoom right in
+            ax.fill_between(plot_xdata.time_of(overview[0]),overview[1],overview[2],step='post')
         ax.axvline(x=gate_start,color='r',linestyle='--')
         ax.axvline(x=gate_stop,color='r',linestyle='--')
 
@@ -770,28 +869,6 @@ class Actual_Plot(QtWidgets.QMainWindow):
         m = WidgetPlot(self)
         vlay.addWidget(m)
 
-def Correct_FID_Length_Window(local_FID,Window): #this operation does zero filling and scaling of FID by window function; trying for good balance of resolution and intensity
-    Npts = local_FID.size
-    Nfid = np.ceil(np.log2(Npts))+4 # This is maybe a bit excessive...
-    Nnew = np.power(2,Nfid)
-    New_FID = np.multiply(local_FID, Window)
-    Nbuffer = int(Nnew - Npts)
-    Zerofill = np.zeros(Nbuffer)
-    FID_buffer = np.concatenate((New_FID, Zerofill), axis=0)
-    return FID_buffer
-
-def Freq_Spectrum(local_FID,sample,PDRO): # Does the actual Fourier transform
-    ftcalc = np.fft.fft(local_FID,norm="ortho")
-    ftcalc = np.absolute(ftcalc)
-    NumFreq = ftcalc.size
-    Freq = np.zeros(NumFreq)
-    for m in range(NumFreq-1): # Sets up the frequency axis
-        Freq[m] = PDRO - ((m*sample)/local_FID.size)*(10**-6)
-    Ft = np.column_stack((Freq,ftcalc))
-    Ft = np.flip(Ft, 0) # This puts the frequency axis in increasing order
-    return Ft
-
-
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     Dialog = QtWidgets.QDialog()
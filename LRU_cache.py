@@ -0,0 +1,84 @@
+"""
+LRU_cache - the least-recently-used cache behind the loaded FIDs, windows, blank spectra, spur bases and the rest.
+
+The FT and spur tools keep several small "the last few of these" caches, and both the GUI thread and the
+worker threads read and fill them. An LRU_Cache is an OrderedDict kept in the order its entries were last
+used, with a lock taken by every method, so a cache can be shared without each caller locking it by hand.
+
+It holds at most max_entries entries and, if max_bytes is given, at most max_bytes of them as measured by
+size (an array's nbytes by default); a value bigger than max_bytes on its own isn't kept at all. The least
+recently used entries go first.
+
+Nothing in here should import PyQt5 or matplotlib.
+"""
+
+from __future__ import division, print_function
+
+from collections import OrderedDict
+import threading
+
+
+def Array_Bytes(value):
+    return value.nbytes
+
+
+class LRU_Cache(object):
+    def __init__(self, max_entries=None, max_bytes=None, size=Array_Bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = size
+        self.entries = OrderedDict() # key -> value, least recently used first
+        self.total_bytes = 0 # Only counted when there's a max_bytes
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key, default=None): # The value for key, which becomes the most recently used, or default if it isn't cached
+        with self.lock:
+            if key not in self.entries:
+                return default
+            value = self.entries.pop(key)
+            self.entries[key] = value
+            return value
+
+    def peek(self, key, default=None): # get, without changing which entry goes first
+        with self.lock:
+            return self.entries.get(key, default)
+
+    def put(self, key, value): # Caches value as the most recently used entry, dropping the oldest ones while over the limits; returns value
+        with self.lock:
+            self.discard(key)
+            if self.max_bytes is not None:
+                value_bytes = self.size(value)
+                if value_bytes > self.max_bytes:
+                    return value
+                self.total_bytes += value_bytes
+            self.entries[key] = value
+            while ((self.max_entries is not None) and (len(self.entries) > self.max_entries)) or ((self.max_bytes is not None) and (self.total_bytes > self.max_bytes)):
+                self.discard(next(iter(self.entries)))
+        return value
+
+    def pop(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            value = self.entries[key]
+            self.discard(key)
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def discard(self, key): # Removes key if it's there; the caller holds the lock
+        if key in self.entries:
+            value = self.entries.pop(key)
+            if self.max_bytes is not None:
+                self.total_bytes -= self.size(value)
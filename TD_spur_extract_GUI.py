@@ -14,8 +14,6 @@ It also implements a progress bar that updates itself with threading. :)
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from functools import partial
-import numpy as np
-import math
 import matplotlib
 import sys
 matplotlib.use("Qt5Agg")
@@ -26,6 +24,9 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from matplotlib.figure import Figure
 from matplotlib import rcParams
 
+from FID_io import Load_FID, Load_Rate_Message, Time_Axis, FID_Overview, Max_Plot_Points
+from Spur_engine import Cut_FID, Spur_List, Extract_Spurs
+
 class Ui_Dialog_First_Window(object):
     def setupUi(self, Dialog):
         Dialog.setObjectName("Dialog")
@@ -87,6 +88,11 @@ class Ui_Dialog_First_Window(object):
         self.full_FID_cb.setText("Use Full FID")
         self.gridLayout.addWidget(self.full_FID_cb, 1, 5, 1, 1)
         self.full_FID_cb.stateChanged.connect(self.are_we_there_yet)
+        self.joint_fit_cb = QtWidgets.QCheckBox(Dialog)
+        self.joint_fit_cb.setObjectName("joint_fit_cb")
+        self.joint_fit_cb.setToolTip("If checked, fit all of the spurs together by least squares instead of one at a time.\nFitting them one at a time is only exact when the gate holds a whole number of periods of every spur;\nthe joint fit takes the spurs out properly from shorter or odd-length gates too, but takes longer.")
+        self.joint_fit_cb.setText("Joint Fit")
+        self.gridLayout.addWidget(self.joint_fit_cb, 1, 4, 1, 1)
         self.font_minus_button = QtWidgets.QPushButton(Dialog)
         self.font_minus_button.setObjectName = "font_minus_button"
         self.font_minus_button.clicked.connect(partial(self.font_minus,Dialog))
@@ -238,13 +244,10 @@ class Ui_Dialog_First_Window(object):
 
     	global FID
     	global xdata
-
-    	FID = []
-    	xdata = []
-    	row_counter = 0
+    	global FID_file
 
     	try:
-    		data_input_file = open(self.file_import_input.text())
+    		open(self.file_import_input.text()).close()
     	except:
     		self.error_message = "That file couldn't be opened. Try again with a different one." # We'll make this be a pop-up error window later
     		self.raise_error()
@@ -252,11 +255,11 @@ class Ui_Dialog_First_Window(object):
     		return 0
 
     	try:
-    		for row in data_input_file:
-    			temp=row.split()
-    			FID.append(float(temp[np.size(temp)-1]))
-    			xdata.append((row_counter/sample_rate)*1e6) # to put it in microseconds
-    			row_counter += 1
+    		data_set = Load_FID(self.file_import_input.text()) # Also writes the index sidecar the FT GUI and engine can reuse
+    		FID = data_set.FID
+    		xdata = Time_Axis(sample_rate, FID.size) # in microseconds, computed on demand rather than stored
+    		FID_file = data_set.file_name
+    		print "Data file loaded: %s"%(Load_Rate_Message(FID.size, data_set.load_time))
     		if self.full_FID_cb.isChecked():
     			self.gate_start_input.setText(str(xdata[0]))
     			self.gate_stop_input.setText(str(xdata[-1]))
@@ -438,7 +441,9 @@ class Ui_Dialog_First_Window(object):
     		gate_stop = xdata[-1]
 
     	thread = self.thread = QtCore.QThread()
-    	worker = self.worker = Worker(gate_start, gate_stop, sample_rate, spur_spacing, spur_max_limit,output_file_name) # give it whatever arguments it needs
+    	joint_fit = self.joint_fit_cb.isChecked()
+
+    	worker = self.worker = Worker(gate_start, gate_stop, sample_rate, spur_spacing, spur_max_limit,output_file_name,joint_fit) # give it whatever arguments it needs
     	worker.moveToThread(thread)
     	thread.started.connect(worker.run)
     	worker.progress.connect(self.progress_update)
@@ -476,7 +481,11 @@ class PlotCanvas(FigureCanvas):
 
 	def plot(self):
 		ax = self.figure.add_subplot(111)
-		ax.plot(xdata,FID,'-')
+		overview = FID_Overview(FID_file) if FID.size > Max_Plot_Points else None
+		if overview is None:
+			ax.plot(xdata.values(),FID,'-')
+		else: # Too many points to draw one by one; the min/max of each block of rows from the line index looks the same until you zoom right in
+			ax.fill_between(xdata.time_of(overview[0]),overview[1],overview[2],step='post')
 		ax.axvline(x=gate_start,color='r',linestyle='--')
 		ax.axvline(x=gate_stop,color='r',linestyle='--')
 		ax.set_title('FID + Gates')
@@ -514,7 +523,7 @@ class Data_Plot(QtWidgets.QMainWindow):
 
 class Worker(QtCore.QObject): # looks like we need to use threading in order to get progress bars to update!
 # Thanks go to this thread: https://gis.stackexchange.com/questions/64831/how-do-i-prevent-qgis-from-being-detected-as-not-responding-when-running-a-hea
-	def __init__(self, gate_start, gate_stop, sample_rate, spur_spacing, spur_max_limit, output_file_name, *args, **kwargs):
+	def __init__(self, gate_start, gate_stop, sample_rate, spur_spacing, spur_max_limit, output_file_name, joint_fit=False, *args, **kwargs):
 		QtCore.QObject.__init__(self, *args, **kwargs)
 		self.percentage = 0
 		self.gate_start = gate_start
@@ -523,25 +532,15 @@ class Worker(QtCore.QObject): # looks like we need to use threading in order to
 		self.spur_spacing = spur_spacing
 		self.spur_max_limit = spur_max_limit
 		self.output_file_name = output_file_name
+		self.joint_fit = joint_fit
 
 	def run(self):
 		FID_Cut = Cut_FID(FID, self.gate_start, self.gate_stop, self.sample_rate)
 
-		spurs_list = []
-		spur_max_multiple = int(math.floor(self.spur_max_limit/self.spur_spacing))
-
-		for i in range(spur_max_multiple):
-			spurs_list.append(self.spur_spacing*(i+1))
-
-		data = FID_Cut
+		spurs_list = Spur_List(self.spur_spacing, self.spur_max_limit)
 
 		#outfid = remove_all_spurs(self,spurs_list,FID_Cut,FID_Cut,self.sample_rate)
-		for i in range(len(spurs_list)):
-			print "Removing spur at %s MHz"%str(spurs_list[i]/1e6)
-			(temp_sin,temp_cos) = components(spurs_list[i],FID_Cut,self.sample_rate)
-			data = component_removal(spurs_list[i],data,temp_sin,temp_cos,self.sample_rate)
-			percentage = int(math.floor(float(i+1)/float(len(spurs_list))*100.0))
-			self.calculate_progress(percentage)
+		data = Extract_Spurs(FID_Cut,spurs_list,self.sample_rate,self.calculate_progress,self.report,self.joint_fit) # All the spurs at once: with FFTs when they're on a grid (they usually are), a block of samples at a time otherwise
 
 		output_file = open(self.output_file_name, 'w')
 
@@ -553,6 +552,9 @@ class Worker(QtCore.QObject): # looks like we need to use threading in order to
 		self.done.emit(True)
 		self.finished.emit(True)
 
+	def report(self,message):
+		print message
+
 	def calculate_progress(self,percentage_new):
 
 		if percentage_new > self.percentage:
@@ -564,31 +566,6 @@ class Worker(QtCore.QObject): # looks like we need to use threading in order to
 	done = QtCore.pyqtSignal(bool)
 
 
-# Makes a new list, Cut, that is only the part of the FID within the defined gate
-def Cut_FID(FID, Gate_start, Gate_stop, Sample_Rate):
-    N1 = int(math.floor(Gate_start*1e-6*Sample_Rate))
-    N2 = int(math.floor(Gate_stop*1e-6*Sample_Rate))
-    Cut = FID[N1:N2]
-    return Cut
-
-def components(freq,data,samples_per_second):
-    temp_sin = 0.0
-    temp_cos = 0.0
-    for i in range(0,len(data)):
-        temp_s = np.sin((freq*i*2*math.pi) / samples_per_second)
-        temp_c = np.cos((freq*i*2*math.pi) / samples_per_second)
-        temp_sin = temp_s*data[i] + temp_sin
-        temp_cos = temp_c*data[i] + temp_cos
-    return temp_sin,temp_cos
-
-def component_removal(freq,data,sin_comp,cos_comp,samples_per_second):
-    outfid = []
-    for i in range(len(data)):
-        comp = (((sin_comp*np.sin((freq*i*2*math.pi)/samples_per_second))+(cos_comp*np.cos((freq*i*2*math.pi)/samples_per_second)))*2)/len(data)
-        outfid.append(data[i]-comp)
-    return outfid
-
-
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     Dialog = QtWidgets.QDialog()
@@ -0,0 +1,480 @@
+"""
+Spur_engine - the spur fitting math from TD_spur_extract_GUI, with no PyQt5 or matplotlib, so it can be timed
+(or used from scripts) on machines without a display.
+
+A spur at freq is fitted by projecting the gated FID onto sin and cos at that frequency (components) and the
+fitted sinusoid is then taken off the FID (component_removal). The phases are the same ones the original
+per-sample loops used, (freq*i*2*pi)/samples_per_second for sample i of the gate.
+
+Spurs on a grid (multiples of one spacing, as the worker uses) all repeat after the same number of samples, so
+Extract_Spurs fits and removes all of them with one FFT of the FID folded onto that period and one inverse FFT,
+instead of going spur by spur.
+
+Fitting each spur on its own is only exact when the gate holds a whole number of periods of every spur; with
+joint_fit, Extract_Spurs fits them all together by least squares instead (Joint_Spur_Fit).
+
+Off the grid, the spurs are fitted and removed a block of samples at a time. The sin/cos of every spur over the
+gate (the basis) is worked out once per gate length, sample rate and spur list and kept (Get_Spur_Basis), so later
+files with the same settings skip the trig; set $SPUR_BASIS_CACHE to a directory to also keep the bases there as
+memory-mapped files for later runs. A basis too big to keep (Max_Spur_Basis_Bytes) is replaced by its first block,
+rotated on to each later block's start phase, so the memory stays at a block however long the gate is.
+
+Running this file directly times components() and component_removal() against the original loops, and
+Extract_Spurs against both, e.g.
+
+    python Spur_engine.py --samples 200000 --sample-rate 40 --spur-spacing 5 --max-spur 20
+
+Nothing in here should import PyQt5 or matplotlib.
+"""
+
+from __future__ import division, print_function
+
+from fractions import Fraction
+import argparse
+import glob
+import hashlib
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from LRU_cache_py3 import LRU_Cache
+
+try:
+    from math import gcd
+except ImportError: # Python 2
+    from fractions import gcd
+
+
+Spur_Chunk = 1 << 20 # Samples per block, so the sin/cos temporaries stay a few tens of MB however long the gate is
+Max_Spur_Grid_Length = 1 << 24 # Longest DFT (the spurs' common period, in samples) that Extract_Spurs will use instead of going spur by spur
+Max_Spur_Grid_Drift = 1e-9 # How far (in cycles, over the whole gate) a spur may drift from its DFT bin and still be fitted from the DFT
+
+
+# Makes a new list, Cut, that is only the part of the FID within the defined gate
+def Cut_FID(FID, Gate_start, Gate_stop, Sample_Rate):
+    N1 = int(math.floor(Gate_start*1e-6*Sample_Rate))
+    N2 = int(math.floor(Gate_stop*1e-6*Sample_Rate))
+    Cut = FID[N1:N2]
+    return Cut
+
+def Spur_List(spur_spacing,spur_max_limit): # Every multiple of spur_spacing up to spur_max_limit (Hz), same as the worker has always built it
+    spur_max_multiple = int(math.floor(spur_max_limit/spur_spacing))
+    return [spur_spacing*(i+1) for i in range(spur_max_multiple)]
+
+def Spur_Angles(freq,start,stop,samples_per_second): # The loops' (freq*i*2*pi)/samples_per_second phases for samples start..stop-1, in the same order of operations
+    return (freq*np.arange(start,stop)*2*math.pi)/samples_per_second
+
+def components(freq,data,samples_per_second): # (sum of data*sin, sum of data*cos) at freq, a block of samples at a time instead of one sample at a time
+    data = np.asarray(data, dtype=float)
+    temp_sin = 0.0
+    temp_cos = 0.0
+    for start in range(0, data.size, Spur_Chunk):
+        stop = min(start+Spur_Chunk, data.size)
+        angles = Spur_Angles(freq,start,stop,samples_per_second)
+        temp_sin += np.dot(np.sin(angles), data[start:stop])
+        temp_cos += np.dot(np.cos(angles), data[start:stop])
+    return temp_sin,temp_cos
+
+def components_loop(freq,data,samples_per_second): # The original per-sample version of components, kept to check and time the new one against
+    temp_sin = 0.0
+    temp_cos = 0.0
+    for i in range(0,len(data)):
+        temp_s = np.sin((freq*i*2*math.pi) / samples_per_second)
+        temp_c = np.cos((freq*i*2*math.pi) / samples_per_second)
+        temp_sin = temp_s*data[i] + temp_sin
+        temp_cos = temp_c*data[i] + temp_cos
+    return temp_sin,temp_cos
+
+def component_removal(freq,data,sin_comp,cos_comp,samples_per_second):
+    # Takes the fitted spur (sin_comp, cos_comp from components) off data, a block of samples at a time. A float array is updated
+    # in place (and returned), so a run over thousands of spurs keeps reusing the same array; anything else is copied into one first.
+    data = np.asarray(data, dtype=float)
+    N = len(data)
+    for start in range(0, N, Spur_Chunk):
+        stop = min(start+Spur_Chunk, N)
+        angles = Spur_Angles(freq,start,stop,samples_per_second)
+        comp = np.sin(angles)
+        comp *= sin_comp
+        angles = np.cos(angles, out=angles)
+        angles *= cos_comp
+        comp += angles
+        comp *= 2
+        comp /= N
+        data[start:stop] -= comp
+    return data
+
+def component_removal_loop(freq,data,sin_comp,cos_comp,samples_per_second): # The original per-sample version of component_removal, for checking against
+    outfid = []
+    for i in range(len(data)):
+        comp = (((sin_comp*np.sin((freq*i*2*math.pi)/samples_per_second))+(cos_comp*np.cos((freq*i*2*math.pi)/samples_per_second)))*2)/len(data)
+        outfid.append(data[i]-comp)
+    return outfid
+
+def No_Progress(value):
+    pass
+
+def Spur_Grid(spurs_list,samples_per_second,num_samples):
+    # If every spur is (to within Max_Spur_Grid_Drift over num_samples) a whole number of cycles every p samples, the spurs are all bins
+    # of a p-point DFT: returns (p, array of each spur's bin). Otherwise (or if p would be more than Max_Spur_Grid_Length) returns None.
+    # On the worker's grid that's the usual case, e.g. 50 MHz spurs at 40 GS/s repeat every 800 samples. It also returns None when
+    # p*log2(p) is more than num_samples*len(spurs_list), since then the p-point FFTs would cost more than just doing the trig.
+    p = 1
+    ratios = []
+    for freq in spurs_list:
+        ratio = Fraction(freq/samples_per_second).limit_denominator(Max_Spur_Grid_Length)
+        if abs(freq/samples_per_second - float(ratio))*num_samples > Max_Spur_Grid_Drift:
+            return None
+        p = p*ratio.denominator//gcd(p,ratio.denominator)
+        if p > Max_Spur_Grid_Length:
+            return None
+        ratios.append(ratio)
+    if p*max(1.0, np.log2(p)) > num_samples*len(spurs_list):
+        return None
+    return p, np.array([(ratio.numerator*(p//ratio.denominator)) % p for ratio in ratios], dtype=np.int64)
+
+def Fold_FID(data,p): # data summed modulo p: entry r is the sum of data[r], data[r+p], data[r+2p], ...
+    whole = (data.size//p)*p
+    folded = data[:whole].reshape(-1,p).sum(axis=0) if whole else np.zeros(p)
+    folded[:data.size-whole] += data[whole:]
+    return folded
+
+def Folded_Components(folded,p,bins):
+    # components() for every spur from one p-point FFT of the folded FID: sum(data*cos) and sum(data*sin) at bin b are the real part
+    # and minus the imaginary part of the DFT at b. The FFT of a real sequence is symmetric, so bins past p/2 are mirrored back.
+    ft = np.fft.rfft(folded)
+    mirrored = bins > p//2
+    ft_bins = ft[np.where(mirrored, p-bins, bins)]
+    return np.where(mirrored, ft_bins.imag, -ft_bins.imag), ft_bins.real
+
+def Grid_Components(data,p,bins):
+    return Folded_Components(Fold_FID(data,p),p,bins)
+
+def Grid_Comb(p,bins,sin_amps,cos_amps):
+    # One period of the sum over spurs of sin_amp*sin + cos_amp*cos, which repeats every p samples:
+    # Re(sum of (cos_amp - j*sin_amp)*exp(2j*pi*b*r/p)), so one inverse FFT gives all of it.
+    amplitudes = cos_amps - 1j*sin_amps
+    mirrored = bins > p//2
+    spectrum = np.zeros(p//2+1, dtype=complex)
+    np.add.at(spectrum, np.where(mirrored, p-bins, bins), np.where(mirrored, np.conj(amplitudes), amplitudes)) # Spurs that alias onto the same bin add up, same as taking them off one by one
+    spectrum[1:(p+1)//2] *= 0.5 # irfft counts each of these twice (as the bin and its mirror image)
+    return np.fft.irfft(spectrum, p)*p
+
+def Subtract_Comb(data,comb): # Takes a comb that repeats every comb.size samples off data, in place, one period-sized block at a time
+    p = comb.size
+    whole = (data.size//p)*p
+    if whole:
+        data[:whole].reshape(-1,p)[...] -= comb
+    data[whole:] -= comb[:data.size-whole]
+    return data
+
+def Grid_Removal(data,p,bins,sin_comps,cos_comps): # component_removal() for every spur at once: the fitted spurs, (2/N)*(S*sin + C*cos) each, as one comb
+    N = data.size
+    return Subtract_Comb(data,Grid_Comb(p,bins,(2.0/N)*sin_comps,(2.0/N)*cos_comps))
+
+Spur_Block_Bytes = 64*1024*1024 # Largest block of the (samples x spurs) sin/cos basis worked on at once off the spur grid
+Joint_Fit_Tolerance = 1e-10 # Relative residual the joint fit's conjugate gradient iterates down to
+Max_Joint_Fit_Iterations = 500
+Max_Joint_Fit_Matrix_Bytes = 512*1024*1024 # Largest (2 x spurs) x (2 x spurs) normal matrix the joint fit builds off the spur grid (4096 spurs); with more spurs they're fitted one by one
+
+Max_Spur_Basis_Bytes = 1024*1024*1024 # Total size of the bases kept in memory; a gate whose basis is bigger than this only gets its first block kept
+Max_Spur_Basis_Files = 8 # How many bases are kept on disk; the least recently used ones are deleted
+Spur_Basis_Variable = "SPUR_BASIS_CACHE" # Directory to also keep the bases in on disk; unset (or "") keeps them in memory only
+spur_basis_cache = LRU_Cache(max_bytes=Max_Spur_Basis_Bytes) # (samples, sample rate, spurs) -> basis
+
+def Spur_Basis_Directory():
+    return os.environ.get(Spur_Basis_Variable, "")
+
+def Spur_Basis_File(key): # Where the basis for key is kept on disk (or None if nothing is), named by its size and a hash of the key
+    directory = Spur_Basis_Directory()
+    if not directory:
+        return None
+    key_hash = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(directory, "spur_basis_%d_%d_%s.npy"%(key[0], len(key[2]), key_hash))
+
+def Make_Spur_Basis(num_samples,spurs_list,samples_per_second): # sin and cos of every spur over samples 0..num_samples-1, shape (2, samples, spurs), with the phases of Spur_Angles
+    freqs = np.asarray(spurs_list, dtype=float)
+    basis = np.empty((2, num_samples, freqs.size))
+    rows = max(1, Spur_Block_Bytes//(16*freqs.size)) # So the angles are never more than a block
+    for start in range(0, num_samples, rows):
+        stop = min(start+rows, num_samples)
+        angles = (freqs[np.newaxis,:]*np.arange(start,stop)[:,np.newaxis]*2*math.pi)/samples_per_second
+        np.sin(angles, out=basis[0,start:stop])
+        np.cos(angles, out=basis[1,start:stop])
+    return basis
+
+def Load_Spur_Basis(file_name,shape): # The basis kept in file_name, memory-mapped, or None if it isn't there or isn't usable
+    try:
+        basis = np.load(file_name, mmap_mode='r')
+        if (basis.shape != shape) or (basis.dtype != np.float64):
+            return None
+        os.utime(file_name, None) # Marks it as recently used, so it's not the next one deleted
+        return basis
+    except Exception:
+        return None
+
+def Save_Spur_Basis(file_name,basis): # Keeps basis on disk for later runs; quietly does nothing where that isn't allowed
+    try:
+        if not os.path.isdir(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name + ".tmp", 'wb') as basis_file: # Written under another name first, so nobody maps a half-written basis
+            np.save(basis_file, basis)
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        os.rename(file_name + ".tmp", file_name)
+        kept = sorted(glob.glob(os.path.join(os.path.dirname(file_name), "spur_basis_*.npy")), key=os.path.getmtime)
+        for old_file in kept[:max(0, len(kept) - Max_Spur_Basis_Files)]:
+            os.remove(old_file)
+    except (IOError, OSError):
+        pass
+
+def Get_Spur_Basis(num_samples,spurs_list,samples_per_second):
+    # Make_Spur_Basis, but remembered by (samples, sample rate, spurs): in memory, and if Spur_Basis_Variable names a directory, on disk as a
+    # memory-mapped .npy for later runs. The arrays are shared, so they're read-only.
+    key = (num_samples, float(samples_per_second), tuple(float(freq) for freq in spurs_list))
+    basis = spur_basis_cache.get(key)
+    if basis is not None:
+        return basis
+    file_name = Spur_Basis_File(key)
+    if file_name is not None:
+        basis = Load_Spur_Basis(file_name, (2, num_samples, len(spurs_list)))
+    if basis is None:
+        basis = Make_Spur_Basis(num_samples,spurs_list,samples_per_second)
+        if file_name is not None:
+            Save_Spur_Basis(file_name,basis)
+        basis.setflags(write=False)
+    return spur_basis_cache.put(key, basis)
+
+def Spur_Basis_Blocks(num_samples,spurs_list,samples_per_second):
+    # (start, stop, sin block, cos block) over the gate, each block being the sin/cos of every spur (columns) at samples start..stop-1 (rows),
+    # with the phases of Spur_Angles. Blocks are sized to stay under Spur_Block_Bytes. When the whole gate's basis fits in Max_Spur_Basis_Bytes
+    # the blocks are slices of it (from Get_Spur_Basis), so a second file with the same gate and spurs needs no trig at all. Otherwise only the
+    # first block is kept and every later one is it rotated by the block's start phase (sin(a+b) = sin a cos b + cos a sin b, and the same for
+    # cos, which matches Spur_Angles to rounding), so the only trig is one sin/cos per spur per block; those later blocks reuse the same arrays,
+    # so each block has to be used before asking for the next.
+    freqs = np.asarray(spurs_list, dtype=float)
+    rows = min(num_samples, max(1, Spur_Block_Bytes//(16*freqs.size)))
+    if 16*freqs.size*num_samples <= Max_Spur_Basis_Bytes:
+        basis = Get_Spur_Basis(num_samples,spurs_list,samples_per_second)
+        for start in range(0, num_samples, rows):
+            stop = min(start+rows, num_samples)
+            yield start, stop, basis[0,start:stop], basis[1,start:stop]
+        return
+    (first_sin, first_cos) = Get_Spur_Basis(rows,spurs_list,samples_per_second)
+    (sin_block, cos_block, product) = (None, None, None)
+    for start in range(0, num_samples, rows):
+        stop = min(start+rows, num_samples)
+        if start == 0:
+            yield start, stop, first_sin, first_cos
+            continue
+        if sin_block is None:
+            (sin_block, cos_block, product) = (np.empty((rows, freqs.size)), np.empty((rows, freqs.size)), np.empty((rows, freqs.size)))
+        phases = (freqs*start*2*math.pi)/samples_per_second
+        (sin_phases, cos_phases) = (np.sin(phases), np.cos(phases))
+        block = slice(0, stop-start)
+        np.multiply(first_sin[block], cos_phases, out=sin_block[block])
+        sin_block[block] += np.multiply(first_cos[block], sin_phases, out=product[block])
+        np.multiply(first_cos[block], cos_phases, out=cos_block[block])
+        cos_block[block] -= np.multiply(first_sin[block], sin_phases, out=product[block])
+        yield start, stop, sin_block[block], cos_block[block]
+
+def Spur_Components(data,spurs_list,samples_per_second): # components() for every spur at once off the spur grid, as (sin sums, cos sums), a block of samples at a time
+    sin_comps = np.zeros(len(spurs_list))
+    cos_comps = np.zeros(len(spurs_list))
+    for (start, stop, sin_block, cos_block) in Spur_Basis_Blocks(data.size,spurs_list,samples_per_second):
+        sin_comps += np.dot(data[start:stop],sin_block)
+        cos_comps += np.dot(data[start:stop],cos_block)
+    return sin_comps, cos_comps
+
+def Conjugate_Gradient(apply_G,g,progress=No_Progress):
+    # Solves G a = g for a symmetric positive (semi-)definite G that's only available as apply_G(v) = G v. Returns (a, iterations used, converged).
+    a = np.zeros(g.size)
+    r = g.copy()
+    d = r.copy()
+    rr = g_squared = np.dot(r,r)
+    target = (Joint_Fit_Tolerance**2)*rr
+    if rr == 0.0:
+        return a, 0, True
+    for iteration in range(Max_Joint_Fit_Iterations):
+        if rr <= target:
+            return a, iteration, True
+        Gd = apply_G(d)
+        dGd = np.dot(d,Gd)
+        if dGd <= 0.0: # Only left with directions G can't see (e.g. a spur whose sin is zero at every sample), which don't change the fit
+            return a, iteration, True
+        alpha = rr/dGd
+        a += alpha*d
+        r -= alpha*Gd
+        rr_new = np.dot(r,r)
+        d *= rr_new/rr
+        d += r
+        rr = rr_new
+        if rr > 0.0: # How far the residual has come down, on a log scale, towards the target
+            progress(max(0, min(99, int(100.0*math.log(g_squared/rr)/math.log(g_squared/target)))))
+    return a, Max_Joint_Fit_Iterations, rr <= target
+
+def Joint_Spur_Fit(data,spurs_list,samples_per_second,grid=None,progress=No_Progress,report=No_Progress):
+    # Least-squares fit of every spur's sin and cos amplitude at once (minimizing |data - sum of sin_amp*sin + cos_amp*cos|), returned as
+    # (sin amplitudes, cos amplitudes). Projecting each spur on its own, as components() does, is only the least-squares answer when the gate
+    # holds a whole number of periods of every spur; otherwise the spurs leak into each other and this does better.
+    # It solves the normal equations (B^T B) a = B^T data by conjugate gradient. On a spur grid (grid from Spur_Grid) B is a comb that repeats
+    # every p samples, so applying B^T B is two p-point FFTs however long the gate is and nothing spurs x spurs is kept. Otherwise B^T B is
+    # built in one pass over the gate, a block of samples at a time (see Spur_Basis_Blocks), so the trig is done once rather than on every
+    # iteration; that's a (2 x spurs)^2 matrix, so more spurs than Max_Joint_Fit_Matrix_Bytes allows raise a ValueError.
+    S = len(spurs_list)
+    N = data.size
+    if grid is not None:
+        (p, bins) = grid
+        (whole_periods, tail) = (N//p, N % p)
+        def apply_G(v):
+            comb = Grid_Comb(p,bins,v[:S],v[S:])
+            folded = comb*whole_periods # The fold of the comb repeated over the gate, without building the gate
+            folded[:tail] += comb[:tail]
+            return np.concatenate(Folded_Components(folded,p,bins))
+        g = np.concatenate(Grid_Components(data,p,bins))
+    else:
+        if 8*(2*S)**2 > Max_Joint_Fit_Matrix_Bytes:
+            raise ValueError("%d spurs are too many to fit jointly off the spur grid; the fit would need a %.0f MB matrix."%(S, 8*(2*S)**2/1e6))
+        report("Building the %d x %d normal matrix"%(2*S, 2*S))
+        G = np.zeros((2*S, 2*S))
+        product = np.empty((S, S)) # np.dot can't write into the (non-contiguous) quarters of G directly
+        g = np.zeros(2*S)
+        for (start, stop, sin_block, cos_block) in Spur_Basis_Blocks(N,spurs_list,samples_per_second):
+            G[:S,:S] += np.dot(sin_block.T,sin_block,out=product)
+            G[:S,S:] += np.dot(sin_block.T,cos_block,out=product)
+            G[S:,S:] += np.dot(cos_block.T,cos_block,out=product)
+            g[:S] += np.dot(data[start:stop],sin_block)
+            g[S:] += np.dot(data[start:stop],cos_block)
+        G[S:,:S] = G[:S,S:].T
+        def apply_G(v):
+            return np.dot(G,v)
+    (a, iterations, converged) = Conjugate_Gradient(apply_G,g,progress)
+    if converged:
+        report("Joint fit converged in %d iterations"%(iterations))
+    else:
+        report("Joint fit stopped after %d iterations without fully converging; the spurs are probably too close together for this gate"%(iterations))
+    return a[:S], a[S:]
+
+def Joint_Spur_Removal(data,spurs_list,samples_per_second,sin_amps,cos_amps,grid=None): # Takes the jointly fitted spurs off data, in place
+    if grid is not None:
+        (p, bins) = grid
+        return Subtract_Comb(data,Grid_Comb(p,bins,sin_amps,cos_amps))
+    for (start, stop, sin_block, cos_block) in Spur_Basis_Blocks(data.size,spurs_list,samples_per_second):
+        data[start:stop] -= np.dot(sin_block,sin_amps) + np.dot(cos_block,cos_amps)
+    return data
+
+def Extract_Spurs(FID_Cut,spurs_list,samples_per_second,progress=No_Progress,report=No_Progress,joint_fit=False):
+    # Fits every spur in spurs_list to FID_Cut and takes them all off a copy of it, which is returned. Each spur is fitted to FID_Cut as it was,
+    # like the worker has always done, so the spurs can all be fitted first and then removed together. On a spur grid (see Spur_Grid) that's one
+    # FFT each way instead of two passes over the FID per spur; otherwise it's the same as components() + component_removal() spur by spur,
+    # but done for every spur at once a block of samples at a time (see Spur_Basis_Blocks).
+    # With joint_fit, the spurs are fitted together by least squares instead (see Joint_Spur_Fit), which also works for gates that aren't a
+    # whole number of periods of every spur; off the spur grid that's limited to as many spurs as Max_Joint_Fit_Matrix_Bytes allows.
+    # progress gets the percentage done, report gets status messages.
+    data = np.array(FID_Cut, dtype=float)
+    if (data.size == 0) or (len(spurs_list) == 0):
+        return data
+    grid = Spur_Grid(spurs_list,samples_per_second,data.size)
+    if joint_fit and (grid is None) and (8*(2*len(spurs_list))**2 > Max_Joint_Fit_Matrix_Bytes):
+        report("%d spurs are too many to fit jointly off the spur grid (see Max_Joint_Fit_Matrix_Bytes); fitting them one by one instead"%(len(spurs_list)))
+        joint_fit = False
+    if joint_fit:
+        report("Fitting %d spurs (%s to %s MHz) jointly%s"%(len(spurs_list),str(spurs_list[0]/1e6),str(spurs_list[-1]/1e6)," with %d-point FFTs"%(grid[0]) if grid is not None else ""))
+        (sin_amps, cos_amps) = Joint_Spur_Fit(data,spurs_list,samples_per_second,grid,progress,report)
+        Joint_Spur_Removal(data,spurs_list,samples_per_second,sin_amps,cos_amps,grid)
+        progress(100)
+        return data
+    if grid is None: # Same fit as components() + component_removal() spur by spur, but every spur at once, a block of samples at a time
+        N = data.size
+        report("Removing %d spurs (%s to %s MHz), %d samples at a time"%(len(spurs_list),str(spurs_list[0]/1e6),str(spurs_list[-1]/1e6),min(N, max(1, Spur_Block_Bytes//(16*len(spurs_list))))))
+        (sin_comps, cos_comps) = Spur_Components(data,spurs_list,samples_per_second)
+        progress(50)
+        Joint_Spur_Removal(data,spurs_list,samples_per_second,(2.0/N)*sin_comps,(2.0/N)*cos_comps)
+        progress(100)
+        return data
+    (p, bins) = grid
+    report("Removing %d spurs (%s to %s MHz) with a %d-point FFT"%(len(spurs_list),str(spurs_list[0]/1e6),str(spurs_list[-1]/1e6),p))
+    (sin_comps, cos_comps) = Grid_Components(data,p,bins)
+    progress(50)
+    Grid_Removal(data,p,bins,sin_comps,cos_comps)
+    progress(100)
+    return data
+
+def Benchmark_Spurs(num_samples,spurs_list,samples_per_second,repeats=3):
+    # Times components() + component_removal() against the original loops over spurs_list on the same random gate. Returns
+    # (loop seconds per spur, vectorized seconds per spur, largest coefficient difference relative to the largest coefficient,
+    # largest difference in the spur-removed FIDs relative to the largest FID value) - the last two over the spurs both ran on.
+    data = np.random.RandomState(0).standard_normal(num_samples)
+    loop_spurs = spurs_list[:repeats] # The loops are far too slow to run over every spur
+    start = time.time()
+    loop_coefficients = []
+    loop_FID = data
+    for freq in loop_spurs:
+        (temp_sin,temp_cos) = components_loop(freq,data,samples_per_second)
+        loop_FID = component_removal_loop(freq,loop_FID,temp_sin,temp_cos,samples_per_second)
+        loop_coefficients.append((temp_sin,temp_cos))
+    loop_time = (time.time() - start)/len(loop_spurs)
+    start = time.time()
+    coefficients = []
+    FID_out = data.copy()
+    for (i, freq) in enumerate(spurs_list):
+        (temp_sin,temp_cos) = components(freq,data,samples_per_second)
+        component_removal(freq,FID_out,temp_sin,temp_cos,samples_per_second)
+        coefficients.append((temp_sin,temp_cos))
+        if i+1 == len(loop_spurs):
+            compare_FID = FID_out.copy()
+    vector_time = (time.time() - start)/len(spurs_list)
+    loop_coefficients = np.array(loop_coefficients)
+    coefficient_difference = np.max(np.abs(np.array(coefficients[:len(loop_spurs)]) - loop_coefficients))/max(np.max(np.abs(loop_coefficients)), 1e-300)
+    FID_difference = np.max(np.abs(compare_FID - np.array(loop_FID)))/np.max(np.abs(data))
+    return loop_time, vector_time, coefficient_difference, FID_difference
+
+def Benchmark_Extract(num_samples,spurs_list,samples_per_second):
+    # Times Extract_Spurs against going spur by spur with components() + component_removal() on the same random gate.
+    # Returns (spur-by-spur seconds, Extract_Spurs seconds, largest difference in the spur-removed FIDs relative to the largest FID value).
+    data = np.random.RandomState(0).standard_normal(num_samples)
+    start = time.time()
+    spur_by_spur = data.copy()
+    for freq in spurs_list:
+        (temp_sin,temp_cos) = components(freq,data,samples_per_second)
+        component_removal(freq,spur_by_spur,temp_sin,temp_cos,samples_per_second)
+    spur_time = time.time() - start
+    start = time.time()
+    extracted = Extract_Spurs(data,spurs_list,samples_per_second)
+    extract_time = time.time() - start
+    return spur_time, extract_time, np.max(np.abs(extracted - spur_by_spur))/np.max(np.abs(data))
+
+def Make_Argument_Parser():
+    parser = argparse.ArgumentParser(description="Time the spur fit and removal (components, component_removal) against the original per-sample loops.")
+    parser.add_argument("--samples", type=int, default=200000, help="gate length in samples (default: 200000)")
+    parser.add_argument("--sample-rate", type=float, default=40.0, help="sample rate in GS/s (default: 40)")
+    parser.add_argument("--spur-spacing", type=float, default=50.0, help="spur spacing in MHz (default: 50)")
+    parser.add_argument("--max-spur", type=float, default=10.0, help="highest spur in GHz (default: 10)")
+    parser.add_argument("--repeats", type=int, default=3, help="how many spurs to time the original loops on (default: 3)")
+    return parser
+
+def main(argv=None):
+    args = Make_Argument_Parser().parse_args(argv)
+    spurs_list = Spur_List(args.spur_spacing*1e6, args.max_spur*1e9)
+    if (args.samples <= 0) or (len(spurs_list) == 0) or (args.repeats <= 0):
+        print("Need at least one sample, one spur and one repeat.")
+        return 1
+    (loop_time, vector_time, coefficient_difference, FID_difference) = Benchmark_Spurs(args.samples, spurs_list, args.sample_rate*1e9, args.repeats)
+    print("%d samples, %d spurs"%(args.samples, len(spurs_list)))
+    print("Per-sample loop: %.4f s per spur, %.1f s for all spurs (estimated)"%(loop_time, loop_time*len(spurs_list)))
+    print("Vectorized:      %.4f s per spur, %.1f s for all spurs (%.0fx faster)"%(vector_time, vector_time*len(spurs_list), loop_time/max(vector_time, 1e-12)))
+    print("Largest coefficient difference: %.3g, largest spur-removed FID difference: %.3g (relative)"%(coefficient_difference, FID_difference))
+    grid = Spur_Grid(spurs_list, args.sample_rate*1e9, args.samples)
+    (spur_time, extract_time, extract_difference) = Benchmark_Extract(args.samples, spurs_list, args.sample_rate*1e9)
+    if grid is None:
+        print("Extract_Spurs:   %.1f s for all spurs (no spur grid short enough to pay off, so a block of samples at a time)"%(extract_time))
+    else:
+        print("Extract_Spurs:   %.4f s for all spurs (one %d-point FFT), vs %.1f s vectorized spur by spur (%.0fx faster)"%(extract_time, grid[0], spur_time, spur_time/max(extract_time, 1e-12)))
+    print("Largest Extract_Spurs difference from spur by spur: %.3g (relative)"%(extract_difference))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())